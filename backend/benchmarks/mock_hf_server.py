@@ -0,0 +1,145 @@
+"""Mock HuggingFace inference server for benchmarks.
+
+Speaks the same protocol as the hosted inference API for the summarization,
+translation and question-answering models, with configurable latency,
+random 500 errors and model cold starts. A cold start makes one model
+answer "model is loading" 503s for `loading_estimated_time` seconds, with
+the time left as `estimated_time`, as the hosted API does.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class MockSettings:
+    """Behaviour of the mock server; can be changed while it is running"""
+
+    def __init__(self, latency_ms: float = 50.0, per_item_ms: float = 5.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, loading_rate: float = 0.0, loading_estimated_time: float = 5.0,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.loading_rate = loading_rate
+        self.loading_estimated_time = loading_estimated_time
+        self.rng = random.Random(seed)
+        # model -> monotonic time its current cold start ends
+        self.loading_until: Dict[str, float] = {}
+        self.requests = 0
+        self.items = 0
+        self.errors = 0
+        self.loading = 0
+        self.cold_starts = 0
+
+    def loading_time_left(self, model: str) -> float:
+        """Seconds until `model` has loaded; a loaded model is unloaded with probability loading_rate per call"""
+        now = time.monotonic()
+        until = self.loading_until.get(model, 0.0)
+        if until <= now and self.rng.random() < self.loading_rate:
+            self.cold_starts += 1
+            until = self.loading_until[model] = now + self.loading_estimated_time
+        return max(0.0, until - now)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "items": self.items, "errors": self.errors, "loading": self.loading,
+                "cold_starts": self.cold_starts}
+
+
+def _summarize(text: str, parameters: Dict[str, Any]) -> Dict[str, str]:
+    words = text.split()
+    max_words = max(1, int(parameters.get("max_length", 150)) * 3 // 4)
+    return {"summary_text": " ".join(words[:max_words])}
+
+
+def _translate(model: str, text: str) -> Dict[str, str]:
+    return {"translation_text": f"[{model.rsplit('-', 1)[-1]}] {text}"}
+
+
+def create_app(settings: MockSettings) -> FastAPI:
+    app = FastAPI(title="Mock HuggingFace Inference API")
+
+    @app.post("/{model:path}")
+    async def infer(model: str, request: Request):
+        payload = await request.json()
+        inputs = payload.get("inputs")
+        items = inputs if isinstance(inputs, list) else [inputs]
+        settings.requests += 1
+        settings.items += len(items)
+
+        delay = settings.latency_ms + settings.per_item_ms * len(items)
+        if settings.jitter_ms:
+            delay += settings.rng.uniform(0, settings.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+
+        loading_time_left = settings.loading_time_left(model)
+        if loading_time_left > 0:
+            settings.loading += 1
+            return JSONResponse(status_code=503, content={
+                "error": f"Model {model} is currently loading",
+                "estimated_time": round(loading_time_left, 1),
+            })
+        if settings.rng.random() < settings.error_rate:
+            settings.errors += 1
+            return JSONResponse(status_code=500, content={"error": "Internal error"})
+
+        if "squad" in model:
+            context = inputs.get("context", "") if isinstance(inputs, dict) else ""
+            answer = " ".join(context.split()[:5])
+            return {"answer": answer, "score": 0.9, "start": 0, "end": len(answer)}
+        if "opus-mt" in model:
+            return [_translate(model, text) for text in items]
+        return [_summarize(text, payload.get("parameters", {})) for text in items]
+
+    return app
+
+
+class MockServer:
+    """Runs the mock app with uvicorn on a background thread"""
+
+    def __init__(self, settings: MockSettings, host: str = "127.0.0.1", port: int = 0):
+        self.settings = settings
+        config = uvicorn.Config(create_app(settings), host=host, port=port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, timeout: float = 10.0):
+        self._thread = threading.Thread(target=self._server.run, name="mock-hf-server", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Mock inference server failed to start")
+            time.sleep(0.01)
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the mock HuggingFace inference server")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--per-item-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--loading-rate", type=float, default=0.0)
+    parser.add_argument("--loading-estimated-time", type=float, default=5.0)
+    args = parser.parse_args()
+    settings = MockSettings(args.latency_ms, args.per_item_ms, error_rate=args.error_rate, loading_rate=args.loading_rate,
+                            loading_estimated_time=args.loading_estimated_time)
+    uvicorn.run(create_app(settings), host="127.0.0.1", port=args.port)
@@ -0,0 +1,323 @@
+"""Benchmark the API in-process against the mock inference server.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --scenarios summarize_cold,quiz_warm
+
+Every scenario drives one endpoint at each concurrency level and records
+latency percentiles, throughput, status codes, event-loop lag and RSS. The
+JSON output has the same layout for every run, so results from two commits
+can be compared with `--baseline`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.mock_hf_server import MockServer, MockSettings
+
+WORDS = """
+cell energy protein membrane nucleus enzyme reaction molecule structure function
+system process development theory evidence history economy society culture
+revolution industry production technology research analysis method result
+population environment climate ecosystem species evolution genetics inheritance
+""".split()
+
+LAG_INTERVAL = 0.01
+
+
+def make_text(rng: random.Random, chars: int) -> str:
+    sentences = []
+    length = 0
+    while length < chars:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+        sentence = " ".join(words).capitalize() + "."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values: List[float], q: int) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic sleeper"""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._task.cancel()
+        return False
+
+
+RequestFactory = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class Scenario:
+    """One endpoint under one traffic pattern.
+
+    `request(client, i)` issues the i-th request. With `warm` set, every
+    distinct request is sent once before measuring so results come from cache.
+    """
+
+    def __init__(self, name: str, endpoint: str, request: RequestFactory, warm: bool = False, distinct: Optional[int] = None):
+        self.name = name
+        self.endpoint = endpoint
+        self.request = request
+        self.warm = warm
+        self.distinct = distinct
+
+
+def build_scenarios(args) -> List[Scenario]:
+    rng = random.Random(args.seed)
+    total = args.requests
+    texts = [make_text(rng, args.text_chars) for _ in range(total)]
+    hot = texts[:args.hot_texts]
+    # Duplicate-heavy traffic: most requests hit a small hot set
+    duplicate_picks = [
+        rng.randrange(len(hot)) if rng.random() < args.duplicate_ratio else len(hot) + i
+        for i in range(total)
+    ]
+    summaries = [make_text(rng, min(args.text_chars, 4000)) for _ in range(total)]
+    upload = make_text(rng, args.upload_mb * 1024 * 1024).encode()
+
+    def pick_duplicate(i: int) -> str:
+        choice = duplicate_picks[i]
+        return hot[choice] if choice < len(hot) else texts[choice % total]
+
+    def summarize(text_for: Callable[[int], str]) -> RequestFactory:
+        return lambda client, i: client.post("/summarize/", json={"text": text_for(i), "max_length": 150, "min_length": 30})
+
+    def translate(text_for: Callable[[int], str]) -> RequestFactory:
+        return lambda client, i: client.post("/translate/", json={"text": text_for(i)[:4000], "target_language": "es"})
+
+    def quiz(summary_for: Callable[[int], str]) -> RequestFactory:
+        return lambda client, i: client.post("/quiz/", json={"summary": summary_for(i), "num_questions": 5, "seed": 1})
+
+    def upload_file(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.post("/upload/", files={"file": (f"large-{i}.txt", upload, "text/plain")})
+
+    return [
+        Scenario("summarize_cold", "/summarize/", summarize(lambda i: texts[i])),
+        Scenario("summarize_warm", "/summarize/", summarize(lambda i: hot[i % len(hot)]), warm=True, distinct=len(hot)),
+        Scenario("summarize_duplicates", "/summarize/", summarize(pick_duplicate)),
+        Scenario("translate_cold", "/translate/", translate(lambda i: texts[i])),
+        Scenario("translate_duplicates", "/translate/", translate(pick_duplicate)),
+        Scenario("quiz_cold", "/quiz/", quiz(lambda i: summaries[i])),
+        Scenario("quiz_warm", "/quiz/", quiz(lambda i: summaries[i % args.hot_texts]), warm=True, distinct=args.hot_texts),
+        Scenario("upload_large", "/upload/", upload_file),
+    ]
+
+
+def reset_caches():
+    from cache import cache
+    from quiz_engine import analysis_cache
+    from translation_memory import translation_memory
+    cache.clear()
+    analysis_cache.clear()
+    translation_memory.clear()
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, total: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    next_index = iter(range(total))
+
+    async def worker():
+        for i in next_index:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, i)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    with LoopLagMonitor() as monitor:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ms = [latency * 1000 for latency in latencies]
+    lags = [lag * 1000 for lag in monitor.lags]
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ms), 2) if ms else 0.0,
+            "p50": round(percentile(ms, 50), 2),
+            "p95": round(percentile(ms, 95), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "max": round(max(ms), 2) if ms else 0.0,
+        },
+        "status_codes": dict(sorted(statuses.items())),
+        "loop_lag_ms": {
+            "p99": round(percentile(lags, 99), 2),
+            "max": round(max(lags), 2) if lags else 0.0,
+        },
+        "rss_mb": rss_mb(),
+    }
+
+
+async def run_scenarios(args, scenarios: List[Scenario]) -> List[Dict[str, Any]]:
+    from main import app
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            for scenario in scenarios:
+                for concurrency in args.concurrency:
+                    reset_caches()
+                    if scenario.warm:
+                        for i in range(scenario.distinct or args.requests):
+                            await scenario.request(client, i)
+                    total = args.upload_requests if scenario.endpoint == "/upload/" else args.requests
+                    result = await drive(client, scenario, total, concurrency)
+                    results.append({"scenario": scenario.name, "endpoint": scenario.endpoint, **result})
+                    print(f"{scenario.name:<22} c={concurrency:<4} p50={result['latency_ms']['p50']:>9.2f}ms "
+                          f"p95={result['latency_ms']['p95']:>9.2f}ms p99={result['latency_ms']['p99']:>9.2f}ms "
+                          f"{result['throughput_rps']:>9.2f} req/s lag_max={result['loop_lag_ms']['max']:.1f}ms "
+                          f"rss={result['rss_mb']}MB {result['status_codes']}", file=sys.stderr)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """Print p95 latency and throughput changes against a previous run"""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"Compared with {baseline.get('commit') or 'baseline'}:", file=sys.stderr)
+    for result in current["results"]:
+        old = previous.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        p95_change = (result["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1) * 100 if old["latency_ms"]["p95"] else 0.0
+        rps_change = (result["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+        print(f"{result['scenario']:<22} c={result['concurrency']:<4} p95 {p95_change:+7.1f}%  throughput {rps_change:+7.1f}%", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API against a mock inference server")
+    parser.add_argument("--scenarios", help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--concurrency", default="1,8,32", type=lambda v: [int(c) for c in v.split(",")])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--upload-requests", type=int, default=20)
+    parser.add_argument("--upload-mb", type=int, default=5)
+    parser.add_argument("--text-chars", type=int, default=2000)
+    parser.add_argument("--hot-texts", type=int, default=5, help="Distinct texts in the duplicate-heavy and warm scenarios")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.9)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock upstream latency per call")
+    parser.add_argument("--per-item-ms", type=float, default=5.0, help="Extra mock latency per batched input")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls answered with 500")
+    parser.add_argument("--loading-rate", type=float, default=0.0,
+                        help="Chance per upstream call that a loaded model cold-starts and answers 'model loading' 503s")
+    parser.add_argument("--loading-estimated-time", type=float, default=5.0,
+                        help="Seconds a cold-starting model stays loading (keep below RETRY_MAX_DELAY to be retried)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings = MockSettings(args.latency_ms, args.per_item_ms, args.jitter_ms, args.error_rate, args.loading_rate,
+                            args.loading_estimated_time, seed=args.seed)
+    server = MockServer(settings)
+    server.start()
+
+    # Point the app at the mock server before any backend module is imported
+    os.environ.update({
+        "HUGGINGFACE_API_BASE": server.url,
+        "HUGGINGFACE_API_KEY": "benchmark",
+        "INFERENCE_BACKEND": "remote",
+    })
+    os.environ.pop("MONGODB_URL", None)
+
+    try:
+        scenarios = build_scenarios(args)
+        if args.scenarios:
+            selected = set(args.scenarios.split(","))
+            unknown = selected - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario.name in selected]
+        results = asyncio.run(run_scenarios(args, scenarios))
+    finally:
+        server.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "upstream": settings.stats(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Measure cold-start cost: import time, startup and first-request latency.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --runs 10 --endpoint /quiz/
+
+Every run is a fresh Python process pointed at the mock inference server, as
+a new serverless instance would be. Each run reports how long `import main`
+took, how long the lifespan startup took, the latency of the first request
+and of the one after it, the time from spawning the process to the first
+response, RSS and the number of loaded modules, summarised over the runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# Only the standard library is imported at module level: the child process
+# must import the app from scratch for its import time to mean anything
+
+TEXT = (
+    "Photosynthesis converts light energy into chemical energy in plant cells. "
+    "Chlorophyll absorbs light in the chloroplast membrane. "
+    "The Calvin cycle fixes carbon dioxide into glucose molecules. "
+    "Mitochondria release the stored energy through cellular respiration."
+)
+
+REQUESTS = {
+    "/health": ("GET", None),
+    "/summarize/": ("POST", {"text": TEXT}),
+    "/translate/": ("POST", {"text": TEXT, "target_language": "es"}),
+    "/quiz/": ("POST", {"summary": TEXT, "num_questions": 2}),
+}
+
+METRICS = ("import_ms", "startup_ms", "first_request_ms", "second_request_ms", "spawn_to_first_response_ms")
+
+
+async def measure_requests(app, endpoint: str) -> Dict[str, Any]:
+    import httpx
+
+    method, body = REQUESTS[endpoint]
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup_ms = (time.perf_counter() - started) * 1000
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            latencies = []
+            for _ in range(2):
+                sent = time.perf_counter()
+                response = await client.request(method, endpoint, json=body)
+                latencies.append((time.perf_counter() - sent) * 1000)
+                if len(latencies) == 1:
+                    first_response_at = time.time()
+                    status = response.status_code
+    return {
+        "startup_ms": round(startup_ms, 2),
+        "first_request_ms": round(latencies[0], 2),
+        "second_request_ms": round(latencies[1], 2),
+        "first_response_at": first_response_at,
+        "status": status,
+    }
+
+
+def child(endpoint: str):
+    """One cold start, run in a fresh interpreter; prints a JSON result"""
+    started = time.perf_counter()
+    from main import app
+    import_ms = (time.perf_counter() - started) * 1000
+    result = asyncio.run(measure_requests(app, endpoint))
+    from benchmarks.run import rss_mb
+
+    print(json.dumps({
+        "import_ms": round(import_ms, 2),
+        **result,
+        "rss_mb": rss_mb(),
+        "modules": len(sys.modules),
+    }))
+
+
+def cold_start(endpoint: str, env: Dict[str, str]) -> Dict[str, Any]:
+    spawned_at = time.time()
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", "--endpoint", endpoint],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["spawn_to_first_response_ms"] = round((result.pop("first_response_at") - spawned_at) * 1000, 2)
+    return result
+
+
+def summarise(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs]
+        summary[metric] = {
+            "median": round(statistics.median(values), 2),
+            "min": round(min(values), 2),
+            "max": round(max(values), 2),
+        }
+    summary["rss_mb"] = round(statistics.median(run["rss_mb"] for run in runs), 1)
+    summary["modules"] = int(statistics.median(run["modules"] for run in runs))
+    summary["status_codes"] = sorted({run["status"] for run in runs})
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time and first-request latency of a cold process")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--endpoint", default="/summarize/", choices=sorted(REQUESTS), help="First request sent to each process")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock upstream latency per call")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        child(args.endpoint)
+        return
+
+    from benchmarks.mock_hf_server import MockServer, MockSettings
+    from benchmarks.run import git_commit
+
+    settings = MockSettings(latency_ms=args.latency_ms)
+    server = MockServer(settings)
+    server.start()
+    env = {
+        **os.environ,
+        "HUGGINGFACE_API_BASE": server.url,
+        "HUGGINGFACE_API_KEY": "benchmark",
+        "INFERENCE_BACKEND": "remote",
+    }
+    env.pop("MONGODB_URL", None)
+
+    try:
+        runs = [cold_start(args.endpoint, env) for _ in range(args.runs)]
+        summary = summarise(runs)
+        print(f"import={summary['import_ms']['median']:>8.1f}ms startup={summary['startup_ms']['median']:>8.1f}ms "
+              f"first={summary['first_request_ms']['median']:>8.1f}ms second={summary['second_request_ms']['median']:>8.1f}ms "
+              f"spawn_to_first={summary['spawn_to_first_response_ms']['median']:>8.1f}ms "
+              f"rss={summary['rss_mb']}MB modules={summary['modules']} {summary['status_codes']}", file=sys.stderr)
+    finally:
+        server.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "child")},
+        "upstream": settings.stats(),
+        "summary": summary,
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,252 @@
-import time
-from typing import Dict, Any
+import asyncio
+import functools
 import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+
+# Strings longer than this are keyed by their digest instead of being
+# JSON-escaped into the key data; document texts can be several megabytes
+DIGEST_MIN_CHARS = 4096
+
+# The last key computed in the current request, so the layers wrapping an
+# endpoint (ETag, single-flight, response cache) hash its arguments once
+_request_key: ContextVar[Optional[Tuple[str, tuple, str]]] = ContextVar("request_key", default=None)
+
+
+def _canonical(value: Any) -> Any:
+    """Convert a value into a JSON-serializable structure with a stable layout"""
+    if isinstance(value, BaseModel):
+        return _canonical(value.model_dump(mode="json"))
+    if isinstance(value, str) and len(value) >= DIGEST_MIN_CHARS:
+        return "sha256:" + hashlib.sha256(value.encode()).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    return value
+
+
+def cache_key(namespace: str, *args, **kwargs) -> str:
+    """Build a cache key from a canonical hash of the request fields"""
+    key_data = json.dumps(
+        [namespace, _canonical(args), _canonical(kwargs)],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(key_data.encode()).hexdigest()
+
+
+def request_key(namespace: str, *args) -> str:
+    """cache_key for a call, reusing the key computed for the same call earlier in this request.
+
+    Calls match when they share the namespace and the very same argument
+    objects, as they do when decorators pass a request model down the stack.
+    """
+    memo = _request_key.get()
+    if memo is not None and memo[0] == namespace and len(memo[1]) == len(args) \
+            and all(arg is seen for arg, seen in zip(args, memo[1])):
+        return memo[2]
+    key = cache_key(namespace, *args)
+    _request_key.set((namespace, args, key))
+    return key
+
 
-class SimpleCache:
-    def __init__(self, ttl_seconds: int = 3600):
-        self.cache: Dict[str, Dict[str, Any]] = {}
+def _sizeof(value: Any) -> int:
+    """Approximate the memory footprint of a cached value"""
+    # numpy arrays, and objects holding them that report their own size
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(json.dumps(_canonical(value), default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Bounded LRU cache with a TTL for async function results.
+
+    Entries are evicted when either the entry count or the approximate byte
+    size exceeds its limit; expired entries are also removed by a background
+    sweep task so keys that are never read again do not linger. With
+    `stale_seconds` set, expired entries are kept that much longer so
+    `get_stale` can serve them while the upstream service is unavailable.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 1024,
+                 max_bytes: int = 64 * 1024 * 1024, sweep_interval: float = 60.0, stale_seconds: int = 0):
         self.ttl = ttl_seconds
+        self.stale = stale_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        # key -> (value, size); ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        # key -> expiry time; ordered by insertion, which is expiry order for a fixed TTL
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self._sweeper: Optional[asyncio.Task] = None
 
-    def _get_key(self, func_name: str, args: tuple, kwargs: dict) -> str:
-        """Generate a unique key for the function call"""
-        key_data = f"{func_name}:{args}:{kwargs}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a fresh value is cached, without counting a hit or refreshing its LRU position"""
+        return key in self._entries and self._expiry[key] > time.monotonic()
+
+    def _remove(self, key: str):
+        _, size = self._entries.pop(key)
+        self._expiry.pop(key, None)
+        self.current_bytes -= size
 
     def get(self, key: str) -> Any:
         """Get cached value if not expired"""
-        if key in self.cache:
-            entry = self.cache[key]
-            if time.time() - entry['timestamp'] < self.ttl:
-                return entry['value']
-            else:
-                del self.cache[key]
-        return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at = self._expiry[key]
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self.stale <= now:
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def get_stale(self, key: str) -> Any:
+        """Get a cached value even if it has expired, as long as it is within the stale window"""
+        entry = self._entries.get(key)
+        if entry is None or self._expiry[key] + self.stale <= time.monotonic():
+            return None
+        self.stale_hits += 1
+        return entry[0]
 
     def set(self, key: str, value: Any):
-        """Set cached value with timestamp"""
-        self.cache[key] = {
-            'value': value,
-            'timestamp': time.time()
+        """Set cached value, evicting least recently used entries over the limits"""
+        size = _sizeof(value)
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            # Too large to keep; the previous value for the key is stale either way
+            return
+        self._entries[key] = (value, size)
+        self._expiry[key] = time.monotonic() + self.ttl
+        self.current_bytes += size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._expiry.clear()
+        self.current_bytes = 0
+
+    def sweep(self) -> int:
+        """Remove expired entries and return how many were dropped"""
+        now = time.monotonic()
+        removed = 0
+        while self._expiry:
+            key, expires_at = next(iter(self._expiry.items()))
+            if expires_at + self.stale > now:
+                break
+            self._remove(key)
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logger.debug(f"Cache sweep removed {removed} expired entries")
+
+    def start(self):
+        """Start the background TTL sweep on the running event loop"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    async def stop(self):
+        """Stop the background TTL sweep"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
         }
 
+    def make_key(self, func_name: str, *args) -> str:
+        """Generate the key used by `cached` for a call to `func_name` with these arguments"""
+        return request_key(func_name, *args)
+
     def cached(self, func):
-        """Decorator for caching function results"""
-        def wrapper(*args, **kwargs):
-            key = self._get_key(func.__name__, args, kwargs)
-            cached_result = self.get(key)
+        """Decorator for caching the results of an async function"""
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Bind to the signature so positional and keyword calls share a key
+            with stage("cache_lookup"):
+                bound = signature.bind(*args, **kwargs)
+                key = self.make_key(func.__name__, *bound.arguments.values())
+                cached_result = self.get(key)
             if cached_result is not None:
                 return cached_result
-            result = func(*args, **kwargs)
-            self.set(key, result)
+            result = await func(*args, **kwargs)
+            # A stale fallback returned by func keeps its original expiry
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not result:
+                self.set(key, result)
             return result
         return wrapper
 
+
 # Global cache instance
-cache = SimpleCache(ttl_seconds=3600)  # 1 hour TTL
+cache = LRUCache(
+    ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "3600")),  # 1 hour TTL
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    # Expired responses are served for up to a day while the model is unavailable
+    stale_seconds=int(os.getenv("CACHE_STALE_SECONDS", "86400")),
+)
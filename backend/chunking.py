@@ -0,0 +1,79 @@
+import re
+from typing import Iterator, List
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+# Bullets and numbered or lettered list items start a new line of a paragraph;
+# any other line break is a soft wrap (PDF extraction, hard-wrapped text files)
+_LIST_ITEM = re.compile(r"\s*(?:[-*•‣◦▪–]|\(?(?:\d+|[a-z])[.)])\s+")
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split text on blank lines, dropping empty paragraphs"""
+    return [p.strip() for p in _PARAGRAPH_BREAK.split(text) if p.strip()]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on terminal punctuation followed by whitespace"""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def _hard_split(text: str, max_chars: int) -> Iterator[str]:
+    """Split an oversized sentence at the last whitespace before the limit"""
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        yield text[:cut].strip()
+        text = text[cut:].strip()
+    if text:
+        yield text
+
+
+def split_lines(paragraph: str) -> List[str]:
+    """Split a paragraph into its list items, joining soft-wrapped lines with a space"""
+    lines: List[str] = []
+    for line in paragraph.splitlines():
+        if not line.strip():
+            continue
+        if lines and not _LIST_ITEM.match(line):
+            lines[-1] = f"{lines[-1]} {line.strip()}"
+        else:
+            lines.append(line.strip())
+    return lines
+
+
+def split_line_sentences(paragraph: str, max_chars: int) -> List[List[str]]:
+    """Split a paragraph into its lines, and each line into sentences of at most max_chars"""
+    return [
+        [part for sentence in split_sentences(line) for part in _hard_split(sentence, max_chars)]
+        for line in split_lines(paragraph)
+    ]
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """Pack paragraphs (or sentences of long paragraphs) into chunks of at most max_chars"""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+
+    def flush():
+        nonlocal current, current_len
+        if current:
+            chunks.append("\n\n".join(current))
+        current = []
+        current_len = 0
+
+    for paragraph in split_paragraphs(text):
+        if len(paragraph) <= max_chars:
+            pieces = [paragraph]
+        else:
+            pieces = [part for sentence in split_sentences(paragraph) for part in _hard_split(sentence, max_chars)]
+        for piece in pieces:
+            # +2 accounts for the paragraph separator added on join
+            if current and current_len + len(piece) + 2 > max_chars:
+                flush()
+            current.append(piece)
+            current_len += len(piece) + 2
+    flush()
+    return chunks
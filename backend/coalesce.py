@@ -0,0 +1,52 @@
+import asyncio
+import functools
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from cache import request_key
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share the same key into one upstream call.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is in flight await the same task. The key is released as soon as
+    the task finishes, so failures are never remembered and the next caller
+    retries.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so a disconnecting caller does not cancel the work for the others
+        return await asyncio.shield(task)
+
+    def coalesced_call(self, func):
+        """Decorator coalescing concurrent calls with identical arguments"""
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            key = request_key(func.__name__, *bound.arguments.values())
+            return await self.do(key, lambda: func(*args, **kwargs))
+        return wrapper
+
+
+# Global single-flight instance shared by the routes
+singleflight = SingleFlight()
@@ -1,13 +1,44 @@
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
 MONGODB_URL = os.getenv("MONGODB_URL")
-client = AsyncIOMotorClient(MONGODB_URL)
-database = client.edusummarizer
+# Fail fast when the database is unreachable; results are still served from memory
+MONGODB_TIMEOUT_MS = int(os.getenv("MONGODB_TIMEOUT_MS", "2000"))
+DATABASE_NAME = "edusummarizer"
+
+_client = None
+
+def get_client():
+    """The shared Motor client, created on first use so importing the app opens nothing"""
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        _client = AsyncIOMotorClient(MONGODB_URL, serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS)
+    return _client
+
+def get_collection(name: str):
+    return get_client()[DATABASE_NAME][name]
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+class LazyCollection:
+    """Stand-in for a Motor collection that creates the client on first access"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_collection(self.name), attr)
 
 # Collections
-summaries_collection = database.summaries
-quizzes_collection = database.quizzes
+summaries_collection = LazyCollection("summaries")
+quizzes_collection = LazyCollection("quizzes")
+jobs_collection = LazyCollection("jobs")
+translation_memory_collection = LazyCollection("translation_memory")
+documents_collection = LazyCollection("documents")
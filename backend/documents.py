@@ -0,0 +1,92 @@
+import functools
+import logging
+import os
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from cache import LRUCache, cache_key
+from persistence import ResultStore, upload_store
+
+logger = logging.getLogger(__name__)
+
+# MongoDB documents are limited to 16MB; larger texts are only kept in memory
+MAX_STORED_DOCUMENT_BYTES = 12 * 1024 * 1024
+
+
+class DocumentStore:
+    """Extracted upload text, addressed by a hash of its content.
+
+    Uploads are saved here so clients can refer to a document by id instead
+    of sending its full text back with every request. Texts are kept in an
+    in-memory LRU and, when MongoDB is configured, in the result store so
+    other workers can read them too.
+    """
+
+    def __init__(self, store: ResultStore, ttl_seconds: int = 24 * 3600, max_entries: int = 1024,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.store = store
+        self.memory = LRUCache(ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
+
+    @staticmethod
+    def document_id(text: str) -> str:
+        return cache_key("document", text)
+
+    def save(self, text: str) -> str:
+        """Keep a document's text and return its id; saving the same text twice gives the same id"""
+        document_id = self.document_id(text)
+        self.memory.set(document_id, text)
+        if len(text.encode()) <= MAX_STORED_DOCUMENT_BYTES:
+            self.store.put(document_id, {"text": text, "text_length": len(text), "created_at": datetime.utcnow()})
+        else:
+            logger.info(f"Document {document_id} is too large to persist, keeping it in memory only")
+        return document_id
+
+    async def get(self, document_id: str) -> Optional[str]:
+        text = self.memory.get(document_id)
+        if text is not None:
+            return text
+        stored = await self.store.get(document_id)
+        if stored is None:
+            return None
+        self.memory.set(document_id, stored["text"])
+        return stored["text"]
+
+    async def resolve(self, value: Any) -> Any:
+        """Copy of a request model with `text` filled in from its `document_id`; other values pass through"""
+        if isinstance(value, list):
+            return [await self.resolve(item) for item in value]
+        document_id = getattr(value, "document_id", None) if isinstance(value, BaseModel) else None
+        if not document_id:
+            return value
+        text = await self.get(document_id)
+        if text is None:
+            raise HTTPException(status_code=404, detail="Document not found. Please upload the file again.")
+        # Without the id the request matches a plain-text request for the same document, cache keys included
+        return value.model_copy(update={"text": text, "document_id": None})
+
+    def resolves_documents(self, func):
+        """Decorator letting an endpoint's request models reference an uploaded document by id"""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            args = [await self.resolve(arg) for arg in args]
+            kwargs = {name: await self.resolve(value) for name, value in kwargs.items()}
+            return await func(*args, **kwargs)
+        return wrapper
+
+    def start(self):
+        self.memory.start()
+
+    async def stop(self):
+        await self.memory.stop()
+
+
+# Global document store
+document_store = DocumentStore(
+    upload_store,
+    ttl_seconds=int(os.getenv("DOCUMENT_TTL_SECONDS", str(24 * 3600))),
+    max_bytes=int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+)
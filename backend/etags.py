@@ -0,0 +1,66 @@
+import functools
+import inspect
+from typing import Optional
+
+from fastapi import Request, Response
+
+from cache import cache
+
+
+def make_etag(key: str) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], key: str, exists: bool) -> bool:
+    """Whether an If-None-Match header names the representation for `key`.
+
+    Comparison is weak, as RFC 9110 specifies for If-None-Match, and ignores
+    the content-coding suffix added by the compression middleware: keys are
+    hex digests, so anything after a dash is not part of the key. `*` only
+    matches when a representation `exists`, so a request that would fail
+    (an empty text, say) still gets its error instead of a 304.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            if exists:
+                return True
+            continue
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split("-", 1)[0] == key:
+            return True
+    return False
+
+
+def conditional(func):
+    """Decorator giving a cached endpoint a strong ETag and answering If-None-Match with 304.
+
+    The ETag is the key `cache.cached` uses for the same arguments, so it is
+    known from the request alone: a matching If-None-Match is answered before
+    the endpoint runs, without a cache lookup or any recomputation.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, http_request: Request, http_response: Response, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        key = cache.make_key(func.__name__, *bound.arguments.values())
+        if_none_match = http_request.headers.get("if-none-match")
+        if etag_matches(if_none_match, key, exists=key in cache):
+            # Echo the client's tag, which may carry the content-coding suffix of the response it holds
+            matched = next((tag.strip() for tag in if_none_match.split(",") if key in tag), make_etag(key))
+            return Response(status_code=304, headers={"ETag": matched.removeprefix("W/")})
+        result = await func(*args, **kwargs)
+        http_response.headers["ETag"] = make_etag(key)
+        return result
+
+    # FastAPI reads the signature to inject the request and the response headers
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("http_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        inspect.Parameter("http_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+    ])
+    return wrapper
@@ -0,0 +1,170 @@
+import codecs
+import csv
+import io
+import logging
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Extractor = Callable[[BinaryIO], Iterator[str]]
+
+# File extension -> extractor yielding paragraphs, rows, pages or slides
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+class ExtractionError(Exception):
+    """Raised when text cannot be extracted from an uploaded document"""
+
+
+def register_extractor(*extensions: str):
+    """Decorator registering an extractor for one or more file extensions"""
+    def decorator(func: Extractor) -> Extractor:
+        for ext in extensions:
+            EXTRACTORS[ext.lower()] = func
+        return func
+    return decorator
+
+
+def supported_extensions() -> List[str]:
+    return list(EXTRACTORS.keys())
+
+
+def get_extension(filename: str) -> Optional[str]:
+    """Return the registered extension matching a filename, if any"""
+    name = filename.lower()
+    for ext in EXTRACTORS:
+        if name.endswith(ext):
+            return ext
+    return None
+
+
+def _iter_lines(fileobj: BinaryIO) -> Iterator[str]:
+    """Decode a binary file line by line as UTF-8 without loading it whole"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for raw_line in iter(fileobj.readline, b""):
+        yield decoder.decode(raw_line)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+@register_extractor(".txt", ".md")
+def extract_plain_text(fileobj: BinaryIO) -> Iterator[str]:
+    paragraph: List[str] = []
+    for line in _iter_lines(fileobj):
+        if line.strip():
+            paragraph.append(line.rstrip("\r\n"))
+        elif paragraph:
+            yield "\n".join(paragraph)
+            paragraph = []
+    if paragraph:
+        yield "\n".join(paragraph)
+
+
+@register_extractor(".csv")
+def extract_csv(fileobj: BinaryIO) -> Iterator[str]:
+    for row in csv.reader(_iter_lines(fileobj)):
+        if any(cell.strip() for cell in row):
+            yield ", ".join(cell.strip() for cell in row)
+
+
+@register_extractor(".pdf")
+def extract_pdf(fileobj: BinaryIO) -> Iterator[str]:
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError as e:
+        raise ExtractionError("PDF support is not installed") from e
+
+    try:
+        reader = PdfReader(fileobj)
+        # Pages are parsed lazily, one at a time
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            if text.strip():
+                yield text.strip()
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"Could not read PDF file: {str(e)}") from e
+
+
+@register_extractor(".docx")
+def extract_docx(fileobj: BinaryIO) -> Iterator[str]:
+    try:
+        import docx
+    except ImportError as e:
+        raise ExtractionError("DOCX support is not installed") from e
+
+    try:
+        document = docx.Document(fileobj)
+    except Exception as e:
+        raise ExtractionError(f"Could not read DOCX file: {str(e)}") from e
+    for paragraph in document.paragraphs:
+        if paragraph.text.strip():
+            yield paragraph.text.strip()
+    for table in document.tables:
+        for row in table.rows:
+            cells = [cell.text.strip() for cell in row.cells if cell.text.strip()]
+            if cells:
+                yield ", ".join(cells)
+
+
+@register_extractor(".xlsx")
+def extract_xlsx(fileobj: BinaryIO) -> Iterator[str]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ExtractionError("XLSX support is not installed") from e
+
+    try:
+        # read_only streams rows instead of building the whole workbook in memory
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ExtractionError(f"Could not read XLSX file: {str(e)}") from e
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                cells = [str(cell).strip() for cell in row if cell is not None and str(cell).strip()]
+                if cells:
+                    yield ", ".join(cells)
+    finally:
+        workbook.close()
+
+
+@register_extractor(".pptx")
+def extract_pptx(fileobj: BinaryIO) -> Iterator[str]:
+    try:
+        from pptx import Presentation
+    except ImportError as e:
+        raise ExtractionError("PPTX support is not installed") from e
+
+    try:
+        presentation = Presentation(fileobj)
+    except Exception as e:
+        raise ExtractionError(f"Could not read PPTX file: {str(e)}") from e
+    for slide in presentation.slides:
+        texts = [
+            shape.text_frame.text.strip()
+            for shape in slide.shapes
+            if shape.has_text_frame and shape.text_frame.text.strip()
+        ]
+        if texts:
+            yield "\n".join(texts)
+
+
+def iter_text(fileobj: BinaryIO, extension: str) -> Iterator[str]:
+    """Yield text blocks from a document using the extractor for its extension"""
+    extractor = EXTRACTORS.get(extension.lower())
+    if extractor is None:
+        raise ExtractionError(f"Unsupported file type: {extension}")
+    return extractor(fileobj)
+
+
+def extract_text(fileobj: BinaryIO, extension: str) -> str:
+    """Extract the full text of a document; blocking, run it in a worker thread"""
+    buffer = io.StringIO()
+    for block in iter_text(fileobj, extension):
+        if buffer.tell():
+            buffer.write("\n\n")
+        buffer.write(block)
+    return buffer.getvalue()
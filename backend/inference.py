@@ -0,0 +1,726 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, TypeVar
+
+import httpx
+from dotenv import load_dotenv
+
+from metrics import upstream_errors, upstream_in_flight, upstream_seconds
+from resilience import CircuitBreaker, CircuitOpenError, backoff_delay
+from scheduler import BatchScheduler, QueueFullError
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+HUGGINGFACE_API_BASE = os.getenv("HUGGINGFACE_API_BASE", "https://api-inference.huggingface.co/models")
+# remote (HuggingFace inference API), local (in-process transformers on CPU) or fake (deterministic, offline)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "remote")
+
+SUMMARIZE_MODEL = "facebook/bart-large-cnn"
+TRANSLATE_MODEL = "Helsinki-NLP/opus-mt-en-{target_lang}"
+QA_MODEL = "deepset/roberta-base-squad2"
+
+# Per-model request timeouts in seconds (summarization is the slowest model)
+DEFAULT_TIMEOUT = 30.0
+MODEL_TIMEOUTS = {
+    SUMMARIZE_MODEL: 60.0,
+    QA_MODEL: 20.0,
+}
+
+# Per-model limit on concurrent upstream calls
+DEFAULT_CONCURRENCY = 8
+MODEL_CONCURRENCY = {
+    SUMMARIZE_MODEL: 4,
+}
+
+# Maximum number of inputs sent to a model in one upstream request
+BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "16"))
+# BATCH_SIZE slices one caller keeps in flight at once, so a single large
+# request cannot fill the scheduler queue with its own inputs
+MAX_PARALLEL_BATCHES = int(os.getenv("INFERENCE_MAX_PARALLEL_BATCHES", "4"))
+
+# Micro-batching: flush after SCHEDULER_MAX_BATCH_SIZE inputs or SCHEDULER_MAX_WAIT_MS,
+# and reject with 503 once SCHEDULER_MAX_QUEUE inputs per model are waiting or in flight
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_MAX_BATCH_SIZE = int(os.getenv("SCHEDULER_MAX_BATCH_SIZE", str(BATCH_SIZE)))
+SCHEDULER_MAX_WAIT_MS = float(os.getenv("SCHEDULER_MAX_WAIT_MS", "5"))
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "256"))
+
+# Local backend: worker threads running model forward passes
+LOCAL_INFERENCE_THREADS = int(os.getenv("LOCAL_INFERENCE_THREADS", "1"))
+
+# Fake backend: simulated per-call latency in milliseconds
+FAKE_INFERENCE_LATENCY_MS = float(os.getenv("FAKE_INFERENCE_LATENCY_MS", "0"))
+
+# Retries of unavailable/loading models: jittered exponential backoff, honoring
+# Retry-After and `estimated_time`; waits longer than RETRY_MAX_DELAY fail fast with 503
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "10"))
+
+# Per-model circuit breaker: open after this many consecutive failed calls, probe again after the reset time
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# Models loaded in the background at startup so the first request does not pay the cold start
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_MODELS = [
+    model.strip()
+    for model in os.getenv("WARMUP_MODELS", f"{SUMMARIZE_MODEL},{TRANSLATE_MODEL.format(target_lang='es')}").split(",")
+    if model.strip()
+]
+
+MAX_CONNECTIONS = int(os.getenv("INFERENCE_MAX_CONNECTIONS", "32"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("INFERENCE_MAX_KEEPALIVE", "16"))
+
+
+class InferenceError(Exception):
+    """Raised when the inference service fails or returns an error status"""
+
+
+class InferenceTimeout(InferenceError):
+    """Raised when the inference service does not answer within the model timeout"""
+
+
+class InferenceUnavailable(InferenceError):
+    """Raised when a model is loading or temporarily unavailable; `retry_after` is the server's hint, if any"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InferenceRequestError(InferenceError):
+    """Raised when a model rejects the request itself (a 4xx other than 401/403/429).
+
+    The input is at fault, not the model, so these do not count against its circuit breaker.
+    """
+
+
+class InferenceOverloaded(InferenceError):
+    """Raised when too many requests are queued for a model; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Field holding the generated text in each task's response
+OUTPUT_KEYS = {
+    "summarization": "summary_text",
+    "translation": "translation_text",
+}
+
+
+def model_task(model: str) -> str:
+    """Map a model id to the pipeline task it serves"""
+    if model == SUMMARIZE_MODEL:
+        return "summarization"
+    if model.startswith("Helsinki-NLP/opus-mt-"):
+        return "translation"
+    if model == QA_MODEL:
+        return "question-answering"
+    raise InferenceError(f"Unknown model: {model}")
+
+
+# Statuses the hosted API uses for loading models, rate limits and transient gateway errors
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+def retry_hint(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait before retrying, from Retry-After or a loading model's `estimated_time`"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    try:
+        estimated_time = response.json().get("estimated_time")
+    except (ValueError, AttributeError):
+        return None
+    return float(estimated_time) if isinstance(estimated_time, (int, float)) else None
+
+
+def warmup_payload(model: str) -> Dict[str, Any]:
+    """A minimal request that makes the inference API load a model"""
+    if model_task(model) == "question-answering":
+        inputs: Any = {"question": "What is this?", "context": "This is a warm-up request."}
+    else:
+        inputs = "This is a warm-up request."
+    return {"inputs": inputs, "options": {"wait_for_model": True}}
+
+
+async def gather_bounded(awaitables: Iterable[Awaitable[T]], limit: int = MAX_PARALLEL_BATCHES) -> List[T]:
+    """Like asyncio.gather, but with at most `limit` of the awaitables running at once"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
+
+
+class InferenceBackend:
+    """Base class for inference backends.
+
+    Every backend speaks the HuggingFace inference API protocol: `query` takes
+    a model id and a payload with `inputs` (a string or a list of strings) and
+    optional `parameters`, and returns the same JSON the hosted API would.
+    """
+
+    name = "base"
+    # True when `stream` yields tokens as they are generated
+    streams_tokens = False
+
+    @property
+    def is_configured(self) -> bool:
+        return True
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def query(self, model: str, payload: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    async def stream(self, model: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield generated text for a single input as it becomes available.
+
+        Backends that cannot stream yield the whole output once.
+        """
+        result = await self.query(model, payload)
+        item = result[0] if isinstance(result, list) and result else result
+        yield item.get(OUTPUT_KEYS[model_task(model)], "") if isinstance(item, dict) else str(item)
+
+    async def warm_up(self, models: List[str]):
+        """Load models ahead of the first request; failures are logged, not raised"""
+        for model in models:
+            started = time.monotonic()
+            try:
+                await self.query(model, warmup_payload(model))
+                logger.info(f"Warmed up {model} in {time.monotonic() - started:.1f}s")
+            except InferenceError as e:
+                logger.warning(f"Warm-up of {model} failed: {str(e)}")
+
+    def breaker_states(self) -> Dict[str, str]:
+        """Circuit breaker state per model, for backends that have them"""
+        return {}
+
+
+class RemoteBackend(InferenceBackend):
+    """Shared async client for the HuggingFace inference API.
+
+    One pooled keep-alive connection pool is opened at application startup and
+    reused by every route; each model gets its own timeout and concurrency limit.
+    """
+
+    name = "remote"
+
+    def __init__(self, api_key: Optional[str] = HUGGINGFACE_API_KEY, base_url: str = HUGGINGFACE_API_BASE):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    async def start(self):
+        """Open the connection pool"""
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=DEFAULT_TIMEOUT,
+        )
+        logger.info("Inference client started")
+
+    async def close(self):
+        """Close the connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Inference client closed")
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(MODEL_CONCURRENCY.get(model, DEFAULT_CONCURRENCY))
+            self._semaphores[model] = semaphore
+        return semaphore
+
+    async def query(self, model: str, payload: Dict[str, Any]) -> Any:
+        """POST a payload to a model and return the decoded JSON response"""
+        if self._client is None:
+            await self.start()
+
+        timeout = MODEL_TIMEOUTS.get(model, DEFAULT_TIMEOUT)
+        async with self._semaphore(model):
+            try:
+                response = await self._client.post(f"{self.base_url}/{model}", json=payload, timeout=timeout)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise InferenceUnavailable(f"{model} unavailable ({response.status_code})", retry_hint(response))
+                if 400 <= response.status_code < 500 and response.status_code not in (401, 403):
+                    raise InferenceRequestError(f"{model} rejected the request ({response.status_code}): {response.text[:200]}")
+                response.raise_for_status()
+                return response.json()
+            except httpx.TimeoutException as e:
+                raise InferenceTimeout(f"{model} timed out after {timeout}s") from e
+            except httpx.TransportError as e:
+                raise InferenceUnavailable(f"{model} unreachable: {str(e)}") from e
+            except httpx.HTTPError as e:
+                raise InferenceError(str(e)) from e
+
+
+class LocalBackend(InferenceBackend):
+    """In-process CPU inference with transformers pipelines.
+
+    Each model is loaded lazily on first use and kept warm for the life of the
+    process. Forward passes run on a dedicated thread pool so the event loop is
+    never blocked; concurrent requests reach it already micro-batched by the
+    scheduler.
+    """
+
+    name = "local"
+    streams_tokens = True
+
+    def __init__(self, threads: int = LOCAL_INFERENCE_THREADS):
+        self.threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pipelines: Dict[str, Any] = {}
+        self._load_lock = threading.Lock()
+
+    async def start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="inference")
+            logger.info(f"Local inference backend started with {self.threads} worker thread(s)")
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _pipeline(self, model: str):
+        """Load a model once per process; called from worker threads"""
+        pipe = self._pipelines.get(model)
+        if pipe is not None:
+            return pipe
+        with self._load_lock:
+            pipe = self._pipelines.get(model)
+            if pipe is None:
+                try:
+                    from transformers import pipeline
+                except ImportError as e:
+                    raise InferenceError("Local inference requires the transformers package") from e
+                logger.info(f"Loading local model {model}")
+                pipe = pipeline(model_task(model), model=model, device=-1)
+                self._pipelines[model] = pipe
+        return pipe
+
+    def _run(self, model: str, inputs: Any, parameters: Dict[str, Any]) -> Any:
+        pipe = self._pipeline(model)
+        if model_task(model) == "question-answering":
+            return pipe(**inputs)
+        items = inputs if isinstance(inputs, list) else [inputs]
+        outputs = pipe(items, truncation=True, **parameters)
+        return [output[0] if isinstance(output, list) else output for output in outputs]
+
+    async def query(self, model: str, payload: Dict[str, Any]) -> Any:
+        if self._executor is None:
+            await self.start()
+        timeout = MODEL_TIMEOUTS.get(model, DEFAULT_TIMEOUT)
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._run, model, payload["inputs"], payload.get("parameters", {})),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError as e:
+            raise InferenceTimeout(f"{model} timed out after {timeout}s") from e
+        except InferenceError:
+            raise
+        except Exception as e:
+            raise InferenceError(f"Local inference failed: {str(e)}") from e
+
+    async def stream(self, model: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield decoded text as the model generates tokens"""
+        if self._executor is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def generate():
+            from transformers import TextStreamer
+
+            pipe = self._pipeline(model)
+
+            class QueueStreamer(TextStreamer):
+                def on_finalized_text(self, text: str, stream_end: bool = False):
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, text)
+
+            # skip_prompt: encoder-decoder models do not echo the input, but be explicit
+            streamer = QueueStreamer(pipe.tokenizer, skip_prompt=True, skip_special_tokens=True)
+            pipe(payload["inputs"], truncation=True, streamer=streamer, **payload.get("parameters", {}))
+
+        future = loop.run_in_executor(self._executor, generate)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, done))
+        while True:
+            text = await queue.get()
+            if text is done:
+                break
+            yield text
+        try:
+            await future
+        except Exception as e:
+            raise InferenceError(f"Local inference failed: {str(e)}") from e
+
+
+class FakeBackend(InferenceBackend):
+    """Deterministic offline backend for development and load testing.
+
+    Summaries are the leading words of the input, translations are the input
+    tagged with the target language, and answers are the first sentence of the
+    context. An optional fixed latency simulates model time without using CPU.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: float = FAKE_INFERENCE_LATENCY_MS):
+        self.latency = latency_ms / 1000
+
+    def _summarize(self, text: str, parameters: Dict[str, Any]) -> Dict[str, str]:
+        words = text.split()
+        return {"summary_text": " ".join(words[:parameters.get("max_length", 150)])}
+
+    def _translate(self, model: str, text: str) -> Dict[str, str]:
+        target = model.rsplit("-", 1)[-1]
+        return {"translation_text": f"[{target}] {text}"}
+
+    def _answer(self, item: Dict[str, str]) -> Dict[str, Any]:
+        context = item.get("context", "")
+        answer = re.split(r"(?<=[.!?])\s", context, maxsplit=1)[0]
+        return {"answer": answer, "score": 1.0, "start": 0, "end": len(answer)}
+
+    async def query(self, model: str, payload: Dict[str, Any]) -> Any:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        task = model_task(model)
+        inputs = payload["inputs"]
+        parameters = payload.get("parameters", {})
+        if task == "question-answering":
+            return self._answer(inputs)
+        items = inputs if isinstance(inputs, list) else [inputs]
+        if task == "summarization":
+            return [self._summarize(text, parameters) for text in items]
+        return [self._translate(model, text) for text in items]
+
+
+class InstrumentedBackend(InferenceBackend):
+    """Wraps a backend to record per-model latency, in-flight calls and failures"""
+
+    def __init__(self, backend: InferenceBackend):
+        self.backend = backend
+        self.name = backend.name
+        self.streams_tokens = backend.streams_tokens
+
+    @property
+    def is_configured(self) -> bool:
+        return self.backend.is_configured
+
+    async def start(self):
+        await self.backend.start()
+
+    async def close(self):
+        await self.backend.close()
+
+    async def query(self, model: str, payload: Dict[str, Any]) -> Any:
+        upstream_in_flight.inc(model)
+        try:
+            with upstream_seconds.time(model):
+                return await self.backend.query(model, payload)
+        except InferenceTimeout:
+            upstream_errors.inc(model, "timeout")
+            raise
+        except InferenceUnavailable:
+            upstream_errors.inc(model, "unavailable")
+            raise
+        except InferenceRequestError:
+            upstream_errors.inc(model, "rejected")
+            raise
+        except InferenceError:
+            upstream_errors.inc(model, "error")
+            raise
+        finally:
+            upstream_in_flight.dec(model)
+
+    async def stream(self, model: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        upstream_in_flight.inc(model)
+        try:
+            with upstream_seconds.time(model):
+                async for text in self.backend.stream(model, payload):
+                    yield text
+        except InferenceTimeout:
+            upstream_errors.inc(model, "timeout")
+            raise
+        except InferenceUnavailable:
+            upstream_errors.inc(model, "unavailable")
+            raise
+        except InferenceRequestError:
+            upstream_errors.inc(model, "rejected")
+            raise
+        except InferenceError:
+            upstream_errors.inc(model, "error")
+            raise
+        finally:
+            upstream_in_flight.dec(model)
+
+
+class ResilientBackend(InferenceBackend):
+    """Wraps a backend with retries, model warm-up and one circuit breaker per model.
+
+    Calls failing with InferenceUnavailable (a loading model, a rate limit or a
+    gateway error) are retried with jittered exponential backoff, honoring the
+    server's Retry-After or `estimated_time`. While a model is known to be
+    loading, other callers wait for it instead of sending more requests, and
+    waits longer than `max_delay` fail fast with InferenceOverloaded. After
+    repeated failed calls a model's circuit opens and its calls fail fast the
+    same way until a probe call succeeds.
+    """
+
+    def __init__(self, backend: InferenceBackend, attempts: int = RETRY_ATTEMPTS,
+                 base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS,
+                 warmup_models: Optional[List[str]] = None):
+        self.backend = backend
+        self.name = backend.name
+        self.streams_tokens = backend.streams_tokens
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        if warmup_models is None:
+            warmup_models = WARMUP_MODELS if WARMUP_ENABLED else []
+        self.warmup_models = warmup_models
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        # model -> monotonic time before which the model is known to be loading
+        self._ready_at: Dict[str, float] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_configured(self) -> bool:
+        return self.backend.is_configured
+
+    async def start(self):
+        """Start the wrapped backend and warm the configured models in the background"""
+        await self.backend.start()
+        if self.warmup_models and self.is_configured and (self._warmup_task is None or self._warmup_task.done()):
+            self._warmup_task = asyncio.ensure_future(self.warm_up(self.warmup_models))
+
+    async def close(self):
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except asyncio.CancelledError:
+                pass
+            self._warmup_task = None
+        await self.backend.close()
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self.breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(model, self.failure_threshold, self.reset_seconds)
+            self.breakers[model] = breaker
+        return breaker
+
+    def _admit(self, model: str) -> CircuitBreaker:
+        breaker = self._breaker(model)
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            raise InferenceOverloaded(f"{model} is unavailable", math.ceil(e.retry_after)) from e
+        return breaker
+
+    async def _wait_until_ready(self, model: str):
+        wait = self._ready_at.get(model, 0.0) - time.monotonic()
+        if wait <= 0:
+            return
+        if wait > self.max_delay:
+            raise InferenceOverloaded(f"{model} is loading", math.ceil(wait))
+        await asyncio.sleep(wait)
+
+    async def _query_with_retries(self, model: str, payload: Dict[str, Any]) -> Any:
+        for attempt in range(self.attempts):
+            await self._wait_until_ready(model)
+            try:
+                return await self.backend.query(model, payload)
+            except InferenceUnavailable as e:
+                if e.retry_after:
+                    self._ready_at[model] = max(self._ready_at.get(model, 0.0), time.monotonic() + e.retry_after)
+                    if e.retry_after > self.max_delay:
+                        raise InferenceOverloaded(f"{model} is loading", math.ceil(e.retry_after)) from e
+                if attempt + 1 >= self.attempts:
+                    raise
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay, e.retry_after)
+                logger.warning(f"{str(e)}; retrying in {delay:.1f}s (attempt {attempt + 2}/{self.attempts})")
+                await asyncio.sleep(delay)
+
+    async def query(self, model: str, payload: Dict[str, Any]) -> Any:
+        breaker = self._admit(model)
+        try:
+            result = await self._query_with_retries(model, payload)
+        except (InferenceOverloaded, InferenceRequestError):
+            breaker.release()
+            raise
+        except InferenceError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+
+    async def stream(self, model: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        if not self.streams_tokens:
+            async for text in super().stream(model, payload):
+                yield text
+            return
+        # A token stream cannot be replayed, so it gets the circuit breaker but no retries
+        breaker = self._admit(model)
+        try:
+            async for text in self.backend.stream(model, payload):
+                yield text
+        except (InferenceOverloaded, InferenceRequestError):
+            breaker.release()
+            raise
+        except InferenceError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+
+    def breaker_states(self) -> Dict[str, str]:
+        return {model: breaker.state for model, breaker in self.breakers.items()}
+
+
+class ScheduledBackend(InferenceBackend):
+    """Wraps a backend with one micro-batching scheduler per model.
+
+    Summarization and translation inputs are queued per model and parameter
+    set and sent to the wrapped backend as list `inputs`; question answering
+    passes straight through.
+    """
+
+    def __init__(self, backend: InferenceBackend, max_batch_size: int = SCHEDULER_MAX_BATCH_SIZE,
+                 max_wait_ms: float = SCHEDULER_MAX_WAIT_MS, max_queue: int = SCHEDULER_MAX_QUEUE):
+        self.backend = backend
+        self.name = backend.name
+        self.streams_tokens = backend.streams_tokens
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self.schedulers: Dict[str, BatchScheduler] = {}
+
+    @property
+    def is_configured(self) -> bool:
+        return self.backend.is_configured
+
+    async def start(self):
+        await self.backend.start()
+
+    async def close(self):
+        await self.backend.close()
+
+    async def warm_up(self, models: List[str]):
+        # Warm-up requests carry options the batched path would drop
+        await self.backend.warm_up(models)
+
+    async def stream(self, model: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        # Token streams own their generation and bypass batching; backends
+        # without real streaming still go through the batched query path
+        if self.backend.streams_tokens:
+            stream = self.backend.stream(model, payload)
+        else:
+            stream = super().stream(model, payload)
+        async for text in stream:
+            yield text
+
+    def _scheduler(self, model: str) -> BatchScheduler:
+        scheduler = self.schedulers.get(model)
+        if scheduler is None:
+            async def dispatch(group_key: str, items: List[Any]) -> List[Any]:
+                payload: Dict[str, Any] = {"inputs": items if len(items) > 1 else items[0]}
+                parameters = json.loads(group_key)
+                if parameters:
+                    payload["parameters"] = parameters
+                result = await self.backend.query(model, payload)
+                if not isinstance(result, list) or len(result) != len(items):
+                    raise InferenceError(f"{model} returned an unexpected response for a batch of {len(items)}")
+                return [item[0] if isinstance(item, list) else item for item in result]
+
+            scheduler = BatchScheduler(model, dispatch, self.max_batch_size, self.max_wait_ms, self.max_queue)
+            self.schedulers[model] = scheduler
+        return scheduler
+
+    async def query(self, model: str, payload: Dict[str, Any]) -> Any:
+        if model_task(model) == "question-answering":
+            return await self.backend.query(model, payload)
+        inputs = payload["inputs"]
+        items = inputs if isinstance(inputs, list) else [inputs]
+        group_key = json.dumps(payload.get("parameters", {}), sort_keys=True)
+        try:
+            return await self._scheduler(model).submit(group_key, items)
+        except QueueFullError as e:
+            raise InferenceOverloaded(f"{model} is overloaded", e.retry_after) from e
+
+    def breaker_states(self) -> Dict[str, str]:
+        return self.backend.breaker_states()
+
+    def stats(self) -> Dict[str, Any]:
+        return {model: scheduler.stats() for model, scheduler in self.schedulers.items()}
+
+
+BACKENDS = {
+    RemoteBackend.name: RemoteBackend,
+    LocalBackend.name: LocalBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def create_backend(name: str = INFERENCE_BACKEND, scheduled: bool = SCHEDULER_ENABLED) -> InferenceBackend:
+    """Instantiate the configured backend with instrumentation and retries, behind the micro-batching scheduler if enabled"""
+    backend_class = BACKENDS.get(name.lower())
+    if backend_class is None:
+        raise ValueError(f"Unknown inference backend: {name}. Available backends: {', '.join(BACKENDS)}")
+    backend = ResilientBackend(InstrumentedBackend(backend_class()))
+    return ScheduledBackend(backend) if scheduled else backend
+
+
+# Global inference backend instance
+inference_client = create_backend()
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from chunking import split_paragraphs
+from inference import InferenceOverloaded
+from persistence import JobStore, job_store
+from quiz_engine import generate_questions
+from resilience import backoff_delay
+from summarizer import summarize_document
+from translator import translate_documents
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+# Finished jobs kept in memory for polling; older ones are still readable from MongoDB
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "1000"))
+# Large documents are translated a window of paragraphs at a time
+JOB_TRANSLATE_WINDOW_CHARS = int(os.getenv("JOB_TRANSLATE_WINDOW_CHARS", "20000"))
+# A stage hitting a full scheduler queue waits and retries instead of failing the job
+JOB_OVERLOAD_RETRIES = int(os.getenv("JOB_OVERLOAD_RETRIES", "5"))
+JOB_RETRY_BASE_DELAY = 1.0
+JOB_RETRY_MAX_DELAY = 30.0
+
+# Pipeline stages in the order they run
+STAGES = ("summarize", "translate", "quiz")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting; callers should retry later"""
+
+
+class Job:
+    """A document and the pipeline stages to run on it, with per-stage status and results"""
+
+    def __init__(self, text: str, pipeline: List[str], options: Dict[str, Any]):
+        self.job_id = uuid.uuid4().hex
+        self.text = text
+        self.pipeline = [stage for stage in STAGES if stage in pipeline]
+        self.options = options
+        self.text_length = len(text)
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.stages: Dict[str, Dict[str, Any]] = {
+            stage: {"status": QUEUED, "result": None, "error": None, "duration_ms": None} for stage in self.pipeline
+        }
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job state without the input text, as returned to clients and persisted"""
+        done = sum(1 for stage in self.stages.values() if stage["status"] == COMPLETED)
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "pipeline": self.pipeline,
+            "options": self.options,
+            "progress": round(done / len(self.pipeline), 2) if self.pipeline else 1.0,
+            "stages": self.stages,
+            "error": self.error,
+            "text_length": self.text_length,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+async def _summarize(job: Job, source: str) -> Dict[str, Any]:
+    summary = await summarize_document(source, job.options["max_length"], job.options["min_length"])
+    if not summary.strip():
+        raise ValueError("Failed to generate summary")
+    return {"summary": summary}
+
+
+def _windows(text: str, max_chars: int) -> List[str]:
+    """Group paragraphs into windows of about max_chars; a longer paragraph is a window of its own"""
+    windows: List[str] = []
+    current: List[str] = []
+    length = 0
+    for paragraph in split_paragraphs(text):
+        if current and length + len(paragraph) > max_chars:
+            windows.append("\n\n".join(current))
+            current, length = [], 0
+        current.append(paragraph)
+        length += len(paragraph) + 2
+    if current:
+        windows.append("\n\n".join(current))
+    return windows
+
+
+async def _translate(job: Job, source: str) -> Dict[str, Any]:
+    target = job.options["target_language"]
+    # One window at a time keeps the scheduler queue open for other traffic;
+    # windows already done are served from the translation memory on a retry
+    translations = []
+    for window in _windows(source, JOB_TRANSLATE_WINDOW_CHARS):
+        translations.append((await translate_documents([window], target))[0])
+    return {"translated_text": "\n\n".join(translations), "target_language": target}
+
+
+async def _quiz(job: Job, source: str) -> Dict[str, Any]:
+    questions = generate_questions(source, job.options["num_questions"], job.options.get("seed"))
+    if not questions:
+        raise ValueError("Failed to generate quiz questions")
+    return {"questions": [
+        {"question": question, "options": [{"text": option, "is_correct": option == answer} for option in options]}
+        for question, answer, options in questions
+    ]}
+
+
+STAGE_RUNNERS: Dict[str, Callable[[Job, str], Awaitable[Dict[str, Any]]]] = {
+    "summarize": _summarize,
+    "translate": _translate,
+    "quiz": _quiz,
+}
+
+
+class JobQueue:
+    """In-process job queue with a bounded pool of asyncio workers.
+
+    Jobs run their pipeline stages in order; translation and the quiz use the
+    summary when the pipeline produced one and the original text otherwise.
+    Progress and partial results are saved to the job store after every
+    stage, so a client can poll while the job runs and the work survives the
+    request that started it.
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS,
+                 max_queued: int = JOB_MAX_QUEUED, retention: int = JOB_RETENTION):
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Start the worker pool on the running event loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self.store.ensure_indexes()))
+
+    async def stop(self):
+        """Cancel the workers; unfinished jobs are recorded as failed"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for job in list(self.jobs.values()):
+            if not job.finished:
+                job.status = FAILED
+                job.error = "Server shut down before the job finished"
+                await self._save(job)
+
+    async def submit(self, text: str, pipeline: List[str], options: Dict[str, Any]) -> Job:
+        """Queue a job and return it immediately"""
+        if self._queue is None:
+            await self.start()
+        job = Job(text, pipeline, options)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.max_queued} jobs are already queued")
+        self.jobs[job.job_id] = job
+        self._trim()
+        await self._save(job)
+        logger.info(f"Job {job.job_id} queued: {', '.join(job.pipeline)} on {len(text)} characters")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current state of a job, from memory or the job store"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return await self.store.get(job_id)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _trim(self):
+        # Drop the oldest finished jobs from memory once over the retention limit
+        excess = len(self.jobs) - self.retention
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished][:max(0, excess)]:
+            del self.jobs[job_id]
+
+    async def _save(self, job: Job):
+        job.updated_at = datetime.utcnow()
+        await self.store.save(job.to_dict())
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Job {job.job_id} crashed: {str(e)}")
+                job.status = FAILED
+                job.error = "Internal error while processing the job"
+                await self._save(job)
+            finally:
+                # The input text is no longer needed once the job has finished
+                job.text = ""
+                self._queue.task_done()
+                self._trim()
+
+    async def _run_stage(self, name: str, job: Job, source: str) -> Dict[str, Any]:
+        for attempt in range(JOB_OVERLOAD_RETRIES + 1):
+            try:
+                return await STAGE_RUNNERS[name](job, source)
+            except InferenceOverloaded as e:
+                if attempt == JOB_OVERLOAD_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, JOB_RETRY_BASE_DELAY, JOB_RETRY_MAX_DELAY, e.retry_after)
+                logger.info(f"Job {job.job_id} stage {name} overloaded, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        await self._save(job)
+        source = job.text
+        for name in job.pipeline:
+            stage = job.stages[name]
+            stage["status"] = RUNNING
+            await self._save(job)
+            started = time.perf_counter()
+            try:
+                stage["result"] = await self._run_stage(name, job, source)
+            except Exception as e:
+                stage["status"] = FAILED
+                stage["error"] = str(e) or type(e).__name__
+                for later in job.pipeline[job.pipeline.index(name) + 1:]:
+                    job.stages[later]["status"] = SKIPPED
+                job.status = FAILED
+                job.error = f"Stage {name} failed: {stage['error']}"
+                logger.warning(f"Job {job.job_id} failed at {name}: {stage['error']}")
+                await self._save(job)
+                return
+            stage["status"] = COMPLETED
+            stage["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            if name == "summarize":
+                source = stage["result"]["summary"]
+            await self._save(job)
+
+        job.status = COMPLETED
+        await self._save(job)
+        logger.info(f"Job {job.job_id} completed")
+
+
+# Global job queue
+job_queue = JobQueue(job_store)
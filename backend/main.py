@@ -1,8 +1,20 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
+from compression import CompressionMiddleware
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 import logging
+from inference import inference_client
+from cache import cache
+from coalesce import singleflight
+from translation_memory import translation_memory
+from jobs import job_queue
+from persistence import summary_store, quiz_store, translation_store, upload_store
+from documents import document_store
+from database import close_client
+from metrics import registry, Counter, Gauge, CONTENT_TYPE
 
 load_dotenv()
 
@@ -10,7 +22,31 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="EduSummarizer Hub API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared inference connection pool once per worker
+    await inference_client.start()
+    cache.start()
+    await summary_store.start()
+    await quiz_store.start()
+    await translation_store.start()
+    await upload_store.start()
+    translation_memory.start()
+    document_store.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await document_store.stop()
+    await translation_memory.stop()
+    await upload_store.stop()
+    await translation_store.stop()
+    await quiz_store.stop()
+    await summary_store.stop()
+    await cache.stop()
+    await inference_client.close()
+    close_client()
+
+app = FastAPI(title="EduSummarizer Hub API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware for frontend integration - PRODUCTION READY
 app.add_middleware(
@@ -19,8 +55,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    # Lets the frontend read the ETag to send it back in If-None-Match
+    expose_headers=["ETag"],
 )
 
+# Added after CORS so it wraps it and compresses the final response
+app.add_middleware(CompressionMiddleware)
+
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -30,11 +71,12 @@ async def log_requests(request: Request, call_next):
     return response
 
 # Include routers
-from routes import upload, summarize, translate, quiz
+from routes import upload, summarize, translate, quiz, jobs
 app.include_router(upload.router)
 app.include_router(summarize.router)
 app.include_router(translate.router)
 app.include_router(quiz.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
@@ -45,6 +87,65 @@ async def root():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    return {**cache.stats(), "coalesced": singleflight.coalesced, "translation_memory": translation_memory.stats()}
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    return inference_client.stats() if hasattr(inference_client, "stats") else {}
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def collect_runtime_metrics():
+    """Export cache, coalescing and scheduler counters that are already tracked by their owners"""
+    stats = cache.stats()
+    entries = Gauge("cache_entries", "Entries in the response cache")
+    entries.set(stats["entries"])
+    size = Gauge("cache_bytes", "Approximate size of the response cache")
+    size.set(stats["bytes"])
+    lookups = Counter("cache_lookups_total", "Response cache lookups, by result", ("result",))
+    lookups.inc("hit", amount=stats["hits"])
+    lookups.inc("miss", amount=stats["misses"])
+    removals = Counter("cache_removals_total", "Entries removed from the response cache, by reason", ("reason",))
+    removals.inc("eviction", amount=stats["evictions"])
+    removals.inc("expiration", amount=stats["expirations"])
+    coalesced = Counter("coalesced_requests_total", "Requests that joined an identical in-flight request")
+    coalesced.inc(amount=singleflight.coalesced)
+    queued_jobs = Gauge("jobs_queued", "Jobs waiting for a worker")
+    queued_jobs.set(job_queue.queue_depth())
+    memory = translation_memory.stats()
+    sentences = Counter("translation_memory_lookups_total", "Sentence lookups in the translation memory, by result", ("result",))
+    sentences.inc("memory_hit", amount=memory["memory_hits"])
+    sentences.inc("store_hit", amount=memory["store_hits"])
+    sentences.inc("miss", amount=memory["misses"])
+    metrics = [entries, size, lookups, removals, coalesced, queued_jobs, sentences]
+
+    if hasattr(inference_client, "stats"):
+        queue_depth = Gauge("scheduler_queue_depth", "Inputs waiting to be batched, by model", ("model",))
+        batches = Counter("scheduler_batches_total", "Batches dispatched upstream, by model", ("model",))
+        items = Counter("scheduler_items_total", "Inputs dispatched upstream, by model", ("model",))
+        rejected = Counter("scheduler_rejected_total", "Submissions rejected because the queue was full, by model", ("model",))
+        for model, scheduler in inference_client.stats().items():
+            queue_depth.set(scheduler["queue_depth"], model)
+            batches.inc(model, amount=scheduler["batches"])
+            items.inc(model, amount=scheduler["items"])
+            rejected.inc(model, amount=scheduler["rejected"])
+        metrics += [queue_depth, batches, items, rejected]
+
+    circuit = Gauge("upstream_circuit_state", "Circuit breaker state per model (0 closed, 1 half-open, 2 open)", ("model",))
+    for model, state in inference_client.breaker_states().items():
+        circuit.set(CIRCUIT_STATES[state], model)
+    metrics.append(circuit)
+    return metrics
+
+registry.register_collector(collect_runtime_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage, upstream, cache and scheduler metrics"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,263 @@
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Upper bounds of the payload size histogram buckets, in bytes
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 512 * 1024, 1024 * 1024, 5 * 1024 * 1024, 10 * 1024 * 1024)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """A named metric with one series per label-value tuple.
+
+    Series are stored in a dict keyed by the raw label tuple, so recording a
+    sample does no string formatting; names and labels are only rendered when
+    the registry is scraped.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[Any, ...], Any] = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in sorted(self._series.items(), key=lambda item: tuple(map(str, item[0]))):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._series[labels] = self._series.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels):
+        self._series[labels] = value
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._series[labels] = self._series.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        self._series[labels] = self._series.get(labels, 0.0) - amount
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple[Any, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Histogram(Metric):
+    """Histogram with fixed buckets.
+
+    Each series is one preallocated list of per-bucket counts followed by the
+    overflow count and the running sum; `observe` is a bisect and two adds.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels) -> _Timer:
+        """Context manager observing the elapsed wall time of its block"""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        bounds = [*map(_format_value, self.buckets), "+Inf"]
+        for labels, series in sorted(self._series.items(), key=lambda item: tuple(map(str, item[0]))):
+            names = (*self.labelnames, "le")
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, (*labels, bound))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them in the Prometheus text format.
+
+    Collectors are callables run at scrape time that return freshly built
+    metrics, for values that already live elsewhere (cache and scheduler
+    counters) and would be wasteful to mirror on every request.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Metric]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+registry = MetricsRegistry()
+
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route", ("route", "method", "status"))
+stage_seconds = registry.histogram(
+    "request_stage_duration_seconds",
+    "Time spent in each stage of handling a request (validation, cache_lookup, upstream, generation, extraction, serialization)",
+    ("route", "stage"))
+upstream_seconds = registry.histogram(
+    "upstream_request_duration_seconds", "Inference backend call latency, by model", ("model",))
+upstream_in_flight = registry.gauge(
+    "upstream_requests_in_flight", "Inference backend calls currently in progress, by model", ("model",))
+upstream_errors = registry.counter(
+    "upstream_errors_total", "Failed inference backend calls, by model and kind (timeout, unavailable, rejected or error)", ("model", "kind"))
+upload_bytes = registry.histogram(
+    "upload_size_bytes", "Size of accepted uploads; the sum is the total bytes received", (), SIZE_BUCKETS)
+
+
+class _RequestTiming:
+    __slots__ = ("route", "started", "endpoint_finished")
+
+    def __init__(self, route: str, started: float):
+        self.route = route
+        self.started = started
+        self.endpoint_finished: Optional[float] = None
+
+
+# Timing of the request being handled in the current task
+_current_request: contextvars.ContextVar[Optional[_RequestTiming]] = contextvars.ContextVar("current_request", default=None)
+
+
+def stage(name: str) -> _Timer:
+    """Time a block as one stage of the current request; outside a request the route label is empty"""
+    timing = _current_request.get()
+    return _Timer(stage_seconds, (timing.route if timing is not None else "", name))
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records request latency and its generic stages.
+
+    Everything before the endpoint runs (body parsing and model validation)
+    is recorded as `validation`, everything after it returns (response model
+    validation and JSON encoding) as `serialization`. Endpoints record their
+    own inner stages with `stage()`.
+    """
+
+    def get_route_handler(self) -> Callable:
+        route = self.path_format
+        endpoint = self.dependant.call
+
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def timed_endpoint(*args, **kwargs):
+                timing = _current_request.get()
+                if timing is not None:
+                    stage_seconds.observe(time.perf_counter() - timing.started, route, "validation")
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    if timing is not None:
+                        timing.endpoint_finished = time.perf_counter()
+
+            self.dependant.call = timed_endpoint
+
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request):
+            timing = _RequestTiming(route, time.perf_counter())
+            token = _current_request.set(timing)
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            finally:
+                finished = time.perf_counter()
+                if timing.endpoint_finished is not None:
+                    stage_seconds.observe(finished - timing.endpoint_finished, route, "serialization")
+                request_seconds.observe(finished - timing.started, route, request.method, status)
+                _current_request.reset(token)
+
+        return timed_handler
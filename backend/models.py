@@ -3,7 +3,8 @@ from typing import List, Optional
 from datetime import datetime
 
 class Summary(BaseModel):
-    id: Optional[str]
+    id: Optional[str] = None
+    content_hash: Optional[str] = None
     original_text: str
     summarized_text: str
     language: str = "en"
@@ -15,7 +16,8 @@ class QuizQuestion(BaseModel):
     correct_answer: str
 
 class Quiz(BaseModel):
-    id: Optional[str]
+    id: Optional[str] = None
+    content_hash: Optional[str] = None
     summary_id: str
     questions: List[QuizQuestion]
     score: Optional[int] = 0
@@ -24,5 +26,8 @@ class Quiz(BaseModel):
 
 class UploadResponse(BaseModel):
     filename: str
-    content: str
+    content: Optional[str] = None  # Left out with include_content=false
+    preview: Optional[str] = None
+    document_id: str
+    text_length: int
     file_size: int
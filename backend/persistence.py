@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from database import MONGODB_URL, summaries_collection, quizzes_collection, jobs_collection, translation_memory_collection, documents_collection
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = int(os.getenv("STORE_WRITE_BATCH_SIZE", "100"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("STORE_FLUSH_INTERVAL", "1.0"))
+
+
+class ResultStore:
+    """Content-addressed MongoDB store used as a second-tier cache.
+
+    Documents are keyed by `content_hash` (a hash of the input text plus the
+    generation parameters) with a unique index. Reads go straight to Mongo;
+    writes are queued and flushed in batches by a background task so they
+    never add latency to a request. Any collection with the Motor API works,
+    including mongomock-motor in tests. A store without a collection is a no-op.
+    """
+
+    def __init__(self, collection, batch_size: int = WRITE_BATCH_SIZE, flush_interval: float = WRITE_FLUSH_INTERVAL):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._index_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.collection is not None
+
+    async def ensure_indexes(self):
+        if not self.enabled:
+            return
+        try:
+            await self.collection.create_index("content_hash", unique=True)
+        except PyMongoError as e:
+            logger.warning(f"Could not create content_hash index: {str(e)}")
+
+    async def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Look up a stored result; storage errors are logged and treated as a miss"""
+        if not self.enabled:
+            return None
+        pending = self._pending.get(content_hash)
+        if pending is not None:
+            return pending
+        try:
+            with stage("cache_lookup"):
+                return await self.collection.find_one({"content_hash": content_hash}, {"_id": 0})
+        except PyMongoError as e:
+            logger.warning(f"Result store lookup failed: {str(e)}")
+            return None
+
+    async def get_many(self, content_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up several stored results with one indexed query"""
+        if not self.enabled or not content_hashes:
+            return {}
+        found = {h: self._pending[h] for h in content_hashes if h in self._pending}
+        remaining = [h for h in content_hashes if h not in found]
+        if not remaining:
+            return found
+        try:
+            with stage("cache_lookup"):
+                async for document in self.collection.find({"content_hash": {"$in": remaining}}, {"_id": 0}):
+                    found[document["content_hash"]] = document
+        except PyMongoError as e:
+            logger.warning(f"Result store lookup failed: {str(e)}")
+        return found
+
+    def put(self, content_hash: str, document: Dict[str, Any]):
+        """Queue a result for writing without waiting on the database"""
+        if not self.enabled:
+            return
+        self._pending[content_hash] = {**document, "content_hash": content_hash}
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write all queued results in one unordered batch insert"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await self.collection.insert_many(list(batch.values()), ordered=False)
+        except BulkWriteError as e:
+            # Results already stored by another worker hit the unique index; that is expected
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+            if errors:
+                logger.warning(f"Result store write failed for {len(errors)} of {len(batch)} documents")
+        except PyMongoError as e:
+            logger.warning(f"Result store write of {len(batch)} documents failed: {str(e)}")
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        """Start the background writer and create indexes"""
+        if not self.enabled or self._flusher is not None:
+            return
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._flusher = loop.create_task(self._flush_loop())
+        # Index creation waits on server selection, so keep it off the startup path
+        self._index_task = loop.create_task(self.ensure_indexes())
+
+    async def stop(self):
+        """Stop the background writer and flush what is still queued"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self.enabled:
+            await self.flush()
+
+
+class JobStore:
+    """MongoDB collection of job documents keyed by `job_id`.
+
+    Jobs change as they run, so unlike ResultStore every save is an upsert
+    made right away by the worker. Storage errors are logged and never fail
+    the job. A store without a collection is a no-op.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    @property
+    def enabled(self) -> bool:
+        return self.collection is not None
+
+    async def ensure_indexes(self):
+        if not self.enabled:
+            return
+        try:
+            await self.collection.create_index("job_id", unique=True)
+        except PyMongoError as e:
+            logger.warning(f"Could not create job_id index: {str(e)}")
+
+    async def save(self, job: Dict[str, Any]):
+        if not self.enabled:
+            return
+        try:
+            await self.collection.update_one({"job_id": job["job_id"]}, {"$set": job}, upsert=True)
+        except PyMongoError as e:
+            logger.warning(f"Job store write for {job['job_id']} failed: {str(e)}")
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+        except PyMongoError as e:
+            logger.warning(f"Job store lookup failed: {str(e)}")
+            return None
+
+
+# Global stores; persistence is disabled when no MongoDB URL is configured
+summary_store = ResultStore(summaries_collection if MONGODB_URL else None)
+quiz_store = ResultStore(quizzes_collection if MONGODB_URL else None)
+job_store = JobStore(jobs_collection if MONGODB_URL else None)
+translation_store = ResultStore(translation_memory_collection if MONGODB_URL else None)
+upload_store = ResultStore(documents_collection if MONGODB_URL else None)
@@ -0,0 +1,261 @@
+import hashlib
+import random
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from chunking import split_sentences
+
+if TYPE_CHECKING:
+    # numpy is imported by the functions that use it so it stays off the startup path
+    import numpy as np
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how however i if in into is it its itself
+just may me might more most must my myself no nor not now of off on once only or other our ours
+ourselves out over own same she should so some such than that the their theirs them themselves
+then there these they this those through to too under until up upon very was we were what when
+where which while who whom why will with within without would you your yours yourself yourselves
+one two three many much often thus therefore although though whether either neither onto per via
+""".split())
+
+MAX_PHRASE_WORDS = 3
+MIN_WORD_LENGTH = 3
+BLANK = "_____"
+FALLBACK_OPTIONS = ["None of the above", "All of the above", "Not mentioned in the text"]
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+
+# Document analyses keyed by summary hash; the similarity matrices dominate their size
+analysis_cache = LRUCache(ttl_seconds=3600, max_entries=256, max_bytes=64 * 1024 * 1024)
+
+
+class DocumentAnalysis:
+    """Sentences, candidate key phrases and their scores/similarities for one text"""
+
+    def __init__(self, sentences: List[str], phrases: List[str], surfaces: List[str], phrase_scores: "np.ndarray",
+                 sentence_scores: "np.ndarray", similarity: "np.ndarray", occurrences: List[List[int]]):
+        self.sentences = sentences
+        # phrases are lowercased for scoring; surfaces[p] is phrase p as first written in the text
+        self.phrases = phrases
+        self.surfaces = surfaces
+        self.phrase_scores = phrase_scores
+        self.sentence_scores = sentence_scores
+        self.similarity = similarity
+        # occurrences[s] lists the phrase indices found in sentence s
+        self.occurrences = occurrences
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint, used by the analysis cache's byte limit"""
+        arrays = self.phrase_scores.nbytes + self.sentence_scores.nbytes + self.similarity.nbytes
+        strings = sum(len(text) for text in (*self.sentences, *self.phrases, *self.surfaces))
+        return arrays + strings + 8 * sum(len(occ) for occ in self.occurrences)
+
+
+def _candidate_runs(sentence: str) -> List[List[str]]:
+    """RAKE-style candidates: runs of content words split at stopwords"""
+    runs, current = [], []
+    for word in _WORD.findall(sentence.lower()):
+        if word in STOPWORDS or len(word) < MIN_WORD_LENGTH:
+            if current:
+                runs.append(current)
+            current = []
+            continue
+        current.append(word)
+    if current:
+        runs.append(current)
+    return runs
+
+
+def _best_window(run: List[str], word_scores: Dict[str, float], max_words: int = MAX_PHRASE_WORDS) -> str:
+    """The highest-scoring stretch of at most max_words words of a run.
+
+    Longer runs are not cut into fixed pieces, which would split real phrases
+    and leave orphan fragments; ties go to the later window, since English
+    noun phrases end in their head noun.
+    """
+    if len(run) <= max_words:
+        return " ".join(run)
+    windows = [run[start:start + max_words] for start in range(len(run) - max_words + 1)]
+    best = max(reversed(windows), key=lambda window: sum(word_scores[word] for word in window))
+    return " ".join(best)
+
+
+def _sentence_phrases(runs: List[List[str]], word_scores: Dict[str, float]) -> List[str]:
+    """One candidate phrase per run: the run itself or its best window.
+
+    A phrase covering every content word of its sentence would leave a cloze
+    with nothing to answer from, so a sentence's only run gives a shorter window.
+    """
+    if len(runs) == 1:
+        max_words = min(MAX_PHRASE_WORDS, len(runs[0]) - 1)
+        return [_best_window(runs[0], word_scores, max_words)] if max_words else []
+    return [_best_window(run, word_scores) for run in runs]
+
+
+def _analyze(text: str) -> Optional[DocumentAnalysis]:
+    import numpy as np
+
+    sentences = split_sentences(text)
+    sentence_runs = [_candidate_runs(sentence) for sentence in sentences]
+
+    vocab_index: Dict[str, int] = {}
+    for runs in sentence_runs:
+        for run in runs:
+            for word in run:
+                vocab_index.setdefault(word, len(vocab_index))
+    if not vocab_index:
+        return None
+
+    n_sentences, n_vocab = len(sentences), len(vocab_index)
+
+    # Term counts per sentence, built in one scatter-add
+    rows, cols = [], []
+    for s, runs in enumerate(sentence_runs):
+        for run in runs:
+            for word in run:
+                rows.append(s)
+                cols.append(vocab_index[word])
+    counts = np.zeros((n_sentences, n_vocab))
+    np.add.at(counts, (np.array(rows), np.array(cols)), 1)
+
+    # TF-IDF with sentences as documents, rows L2-normalized
+    doc_freq = (counts > 0).sum(axis=0)
+    idf = np.log((1 + n_sentences) / (1 + doc_freq)) + 1
+    tfidf = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1) * idf
+    tfidf /= np.maximum(np.linalg.norm(tfidf, axis=1, keepdims=True), 1e-12)
+
+    # RAKE word score is degree / frequency, with degree taken over the full runs
+    degree = np.zeros(n_vocab)
+    for runs in sentence_runs:
+        for run in runs:
+            for word in run:
+                degree[vocab_index[word]] += len(run)
+    frequency = counts.sum(axis=0)
+    word_scores = degree / np.maximum(frequency, 1) * idf
+
+    # Each run contributes one candidate phrase, shorter than the sentence it blanks
+    scores_by_word = {word: word_scores[v] for word, v in vocab_index.items()}
+    sentence_phrases = [_sentence_phrases(runs, scores_by_word) for runs in sentence_runs]
+    phrase_index: Dict[str, int] = {}
+    for phrases in sentence_phrases:
+        for phrase in phrases:
+            phrase_index.setdefault(phrase, len(phrase_index))
+    incidence = np.zeros((len(phrase_index), n_vocab))
+    for phrase, p in phrase_index.items():
+        for word in phrase.split():
+            incidence[p, vocab_index[word]] = 1
+    phrase_scores = incidence @ word_scores
+
+    # Phrase vectors over sentences (where the phrase's words occur) for distractor similarity
+    vectors = incidence @ tfidf.T
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors @ vectors.T
+
+    occurrences = [sorted({phrase_index[phrase] for phrase in phrases}) for phrases in sentence_phrases]
+    sentence_scores = np.array([phrase_scores[occ].max() if occ else 0.0 for occ in occurrences])
+
+    # Keep each phrase's casing from the first sentence it occurs in
+    phrases = list(phrase_index)
+    surfaces = list(phrases)
+    seen = set()
+    for s, occ in enumerate(occurrences):
+        for p in occ:
+            if p not in seen:
+                seen.add(p)
+                match = _phrase_pattern(phrases[p]).search(sentences[s])
+                if match:
+                    surfaces[p] = match.group(0)
+
+    return DocumentAnalysis(sentences, phrases, surfaces, phrase_scores, sentence_scores, similarity, occurrences)
+
+
+def analyze(text: str) -> Optional[DocumentAnalysis]:
+    """Analyze a text once; repeated calls for the same text reuse the cached result"""
+    key = hashlib.sha256(text.encode()).hexdigest()
+    analysis = analysis_cache.get(key)
+    if analysis is None:
+        analysis = _analyze(text)
+        if analysis is not None:
+            analysis_cache.set(key, analysis)
+    return analysis
+
+
+def _phrase_pattern(phrase: str) -> "re.Pattern":
+    return re.compile(r"\b" + r"\W+".join(re.escape(word) for word in phrase.split()) + r"\b", re.IGNORECASE)
+
+
+def _cloze(sentence: str, phrase: str) -> Optional[Tuple[str, str]]:
+    """The sentence with the phrase blanked out and the phrase as written there.
+
+    None when the phrase is not found or would leave no content words to
+    answer from, as when the phrase is the whole sentence.
+    """
+    match = _phrase_pattern(phrase).search(sentence)
+    if match is None:
+        return None
+    blanked = f"{sentence[:match.start()]}{BLANK}{sentence[match.end():]}"
+    if not _candidate_runs(blanked):
+        return None
+    return blanked, match.group(0)
+
+
+def _distractors(analysis: DocumentAnalysis, answer: int, sentence: int, count: int) -> List[str]:
+    """Pick the phrases most similar to the answer that are not in the question sentence"""
+    import numpy as np
+
+    answer_words = set(analysis.phrases[answer].split())
+    excluded = set(analysis.occurrences[sentence])
+    # Rank by similarity, breaking ties by phrase score
+    order = np.lexsort((-analysis.phrase_scores, -analysis.similarity[answer]))
+    distractors = []
+    for p in order:
+        if p in excluded or answer_words & set(analysis.phrases[p].split()):
+            continue
+        distractors.append(analysis.surfaces[p])
+        if len(distractors) == count:
+            break
+    return distractors
+
+
+def generate_questions(text: str, num_questions: int, seed: Optional[int] = None) -> List[Tuple[str, str, List[str]]]:
+    """Build cloze questions from the highest-scoring sentences.
+
+    Returns (question, correct answer, shuffled options) tuples. Sentences are
+    used at most once until every sentence has a question; the same seed always
+    yields the same quiz.
+    """
+    analysis = analyze(text)
+    if analysis is None:
+        return []
+    rng = random.Random(seed)
+
+    # Candidate (sentence, phrase) pairs, best sentences and phrases first
+    candidates = sorted(
+        ((s, p) for s, occ in enumerate(analysis.occurrences) for p in occ),
+        key=lambda pair: (-analysis.sentence_scores[pair[0]], -analysis.phrase_scores[pair[1]])
+    )
+
+    questions = []
+    used_answers, used_sentences = set(), set()
+    for allow_reuse in (False, True):
+        for s, p in candidates:
+            if len(questions) == num_questions:
+                return questions
+            if p in used_answers or (s in used_sentences and not allow_reuse):
+                continue
+            cloze = _cloze(analysis.sentences[s], analysis.phrases[p])
+            if cloze is None:
+                continue
+            blanked, answer = cloze
+            distractors = _distractors(analysis, p, s, 3)
+            distractors += [option for option in FALLBACK_OPTIONS if option not in distractors][:3 - len(distractors)]
+            options = [answer, *distractors]
+            rng.shuffle(options)
+            questions.append((f"Fill in the blank: {blanked}", answer, options))
+            used_answers.add(p)
+            used_sentences.add(s)
+    return questions
@@ -0,0 +1,83 @@
+import logging
+import random
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, hint: Optional[float] = None,
+                  rng: Optional[random.Random] = None) -> float:
+    """Delay before retry number `attempt` (0-based).
+
+    A server hint (Retry-After or a model's estimated loading time) is honored
+    with a little jitter on top so waiting callers do not retry in lockstep;
+    otherwise the delay is exponential with full jitter.
+    """
+    uniform = (rng or random).uniform
+    if hint is not None and hint > 0:
+        return min(max_delay, hint + uniform(0, base_delay))
+    return uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class CircuitOpenError(Exception):
+    """Raised when a circuit breaker is rejecting calls"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for {name} is open, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected for `reset_seconds`. The first call after that is let through
+    as a probe (half-open): success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call should not be attempted"""
+        if self.state == self.CLOSED:
+            return
+        remaining = self.opened_at + self.reset_seconds - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """End a half-open probe that neither succeeded nor failed (e.g. it was cancelled)"""
+        self._probing = False
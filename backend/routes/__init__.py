@@ -1,2 +1,2 @@
 # Routes package
-from . import upload, summarize, translate, quiz
+from . import upload, summarize, translate, quiz, jobs
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import logging
+from inference import inference_client
+from jobs import job_queue, JobQueueFull, STAGES
+from translator import LANG_MAP
+from metrics import TimedRoute
+from routes.summarize import MAX_TEXT_LENGTH
+from documents import document_store
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], route_class=TimedRoute)
+logger = logging.getLogger(__name__)
+
+# The quiz engine works on summaries; without a summarize stage the text must be summary-sized
+MAX_QUIZ_TEXT_LENGTH = 5000
+
+class JobRequest(BaseModel):
+    text: str = ""
+    document_id: Optional[str] = None  # From POST /upload/; replaces text
+    pipeline: List[str] = list(STAGES)
+    target_language: str = "es"
+    max_length: int = 150
+    min_length: int = 50
+    num_questions: int = 5
+    seed: Optional[int] = None
+
+class JobStage(BaseModel):
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    duration_ms: Optional[float] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    pipeline: List[str]
+    progress: float
+    stages: Dict[str, JobStage]
+    error: Optional[str] = None
+    text_length: int
+    created_at: datetime
+    updated_at: datetime
+
+def validate_job_request(job_request: JobRequest) -> Optional[str]:
+    """Return a validation error message for a job request, or None if it is valid"""
+    if not job_request.text or len(job_request.text.strip()) == 0:
+        return "Text cannot be empty"
+    if len(job_request.text) > MAX_TEXT_LENGTH:
+        return f"Text is too long. Maximum {MAX_TEXT_LENGTH:,} characters allowed."
+    unknown = [stage for stage in job_request.pipeline if stage not in STAGES]
+    if unknown or not job_request.pipeline:
+        return f"Invalid pipeline. Stages must be chosen from: {', '.join(STAGES)}"
+    if "translate" in job_request.pipeline and job_request.target_language.lower() not in LANG_MAP:
+        return f"Unsupported language: {job_request.target_language}. Supported languages: {', '.join(LANG_MAP.keys())}"
+    if "quiz" in job_request.pipeline:
+        if job_request.num_questions < 1 or job_request.num_questions > 10:
+            return "Number of questions must be between 1 and 10"
+        if "summarize" not in job_request.pipeline and len(job_request.text) > MAX_QUIZ_TEXT_LENGTH:
+            return f"Text is too long for a quiz without summarization. Maximum {MAX_QUIZ_TEXT_LENGTH:,} characters allowed."
+    return None
+
+@router.post("/", response_model=JobResponse, status_code=202)
+@document_store.resolves_documents
+async def create_job(job_request: JobRequest):
+    """Queue a document for the summarize → translate → quiz pipeline; poll GET /jobs/{job_id} for progress"""
+    error = validate_job_request(job_request)
+    if error:
+        logger.warning(f"Invalid job request: {error}")
+        raise HTTPException(status_code=400, detail=error)
+
+    if {"summarize", "translate"} & set(job_request.pipeline) and not inference_client.is_configured:
+        logger.error("HuggingFace API key not configured")
+        raise HTTPException(status_code=500, detail="AI service not configured")
+
+    try:
+        job = await job_queue.submit(job_request.text, job_request.pipeline, {
+            "target_language": job_request.target_language.lower(),
+            "max_length": job_request.max_length,
+            "min_length": job_request.min_length,
+            "num_questions": job_request.num_questions,
+            "seed": job_request.seed,
+        })
+    except JobQueueFull as e:
+        logger.warning(f"Job queue full: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many jobs are queued. Please try again shortly.", headers={"Retry-After": "30"})
+    return job.to_dict()
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Status, progress and partial results of a job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
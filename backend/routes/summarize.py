@@ -1,15 +1,26 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import requests
-import os
+from typing import List, Optional
+from datetime import datetime
 import logging
-from cache import cache
+import math
+from cache import cache, cache_key
+from coalesce import singleflight
+from inference import inference_client, InferenceError, InferenceTimeout, InferenceOverloaded, InferenceUnavailable, BATCH_SIZE, gather_bounded
+from summarizer import summarize_document, summarize_chunk_batch, stream_summary, CHUNK_CHARS
+from streaming import event_stream
+from persistence import summary_store
+from models import Summary
+from metrics import TimedRoute
+from documents import document_store
+from etags import conditional
 
-router = APIRouter(prefix="/summarize", tags=["Summarize"])
+router = APIRouter(prefix="/summarize", tags=["Summarize"], route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
 class SummarizeRequest(BaseModel):
-    text: str
+    text: str = ""
+    document_id: Optional[str] = None  # From POST /upload/; replaces text
     max_length: int = 150
     min_length: int = 50
 
@@ -18,60 +29,243 @@ class SummarizeResponse(BaseModel):
     usage_count: int = 0
     tier: str = "free"
 
-HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
-API_URL = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"
-headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
+class BatchSummarizeItem(BaseModel):
+    index: int
+    summary: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchSummarizeResponse(BaseModel):
+    results: List[BatchSummarizeItem]
+    tier: str = "free"
+
+# Matches the upload size limit; longer texts are summarized chunk by chunk
+MAX_TEXT_LENGTH = 10 * 1024 * 1024
+# Only a preview of very long originals is persisted; the content hash identifies the full text
+MAX_STORED_TEXT_LENGTH = 1_000_000
+MAX_BATCH_ITEMS = 500
+
+def validate_summarize_request(summarize_request: SummarizeRequest) -> Optional[str]:
+    """Return a validation error message for a summarize request, or None if it is valid"""
+    if not summarize_request.text or len(summarize_request.text.strip()) == 0:
+        return "Text cannot be empty"
+    if len(summarize_request.text) > MAX_TEXT_LENGTH:
+        return f"Text is too long. Maximum {MAX_TEXT_LENGTH:,} characters allowed."
+    return None
+
+def summary_hash(summarize_request: SummarizeRequest) -> str:
+    """Content hash identifying a persisted summary"""
+    return cache_key(
+        "summary",
+        summarize_request.text,
+        summarize_request.max_length,
+        summarize_request.min_length
+    )
+
+def store_summary(content_hash: str, summarize_request: SummarizeRequest, summary: str):
+    summary_store.put(content_hash, Summary(
+        original_text=summarize_request.text[:MAX_STORED_TEXT_LENGTH],
+        summarized_text=summary,
+        created_at=datetime.utcnow()
+    ).model_dump(exclude={"id", "content_hash"}))
 
 @router.post("/", response_model=SummarizeResponse)
+@document_store.resolves_documents
+@conditional
+@singleflight.coalesced_call
 @cache.cached
 async def summarize_text(summarize_request: SummarizeRequest):
     try:
         # Validate input
-        if not summarize_request.text or len(summarize_request.text.strip()) == 0:
-            logger.warning("Empty text provided for summarization")
-            raise HTTPException(status_code=400, detail="Text cannot be empty")
+        error = validate_summarize_request(summarize_request)
+        if error:
+            logger.warning(f"Invalid summarization request: {error}")
+            raise HTTPException(status_code=400, detail=error)
 
-        if len(summarize_request.text) > 10000:  # Reasonable limit
-            logger.warning(f"Text too long for summarization: {len(summarize_request.text)} characters")
-            raise HTTPException(status_code=400, detail="Text is too long. Maximum 10,000 characters allowed.")
+        # Second-tier lookup of results persisted by this or another worker
+        content_hash = summary_hash(summarize_request)
+        stored = await summary_store.get(content_hash)
+        if stored is not None:
+            logger.info("Summary served from result store")
+            return SummarizeResponse(summary=stored["summarized_text"], usage_count=0, tier="free")
 
         # Validate API key
-        if not HUGGINGFACE_API_KEY:
+        if not inference_client.is_configured:
             logger.error("HuggingFace API key not configured")
             raise HTTPException(status_code=500, detail="AI service not configured")
 
-        payload = {
-            "inputs": summarize_request.text,
-            "parameters": {
-                "max_length": summarize_request.max_length,
-                "min_length": summarize_request.min_length,
-                "do_sample": False
-            }
-        }
-
         logger.info(f"Summarizing text of length {len(summarize_request.text)}")
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-
-        if isinstance(result, list) and result:
-            summary = result[0].get("summary_text", "")
-        else:
-            summary = str(result)
+        summary = await summarize_document(
+            summarize_request.text,
+            summarize_request.max_length,
+            summarize_request.min_length
+        )
 
         if not summary.strip():
             logger.error("Empty summary returned from AI service")
             raise HTTPException(status_code=500, detail="Failed to generate summary")
 
+        store_summary(content_hash, summarize_request, summary)
+
         logger.info(f"Summary generated successfully, length: {len(summary)}")
         return SummarizeResponse(summary=summary, usage_count=0, tier="free")
 
-    except requests.Timeout:
+    except HTTPException:
+        raise
+    except (InferenceOverloaded, InferenceUnavailable) as e:
+        # Serve an expired summary rather than failing while the model is unavailable
+        stale_response = cache.get_stale(cache.make_key("summarize_text", summarize_request))
+        if stale_response is not None:
+            logger.warning(f"AI service unavailable, serving stale summary: {str(e)}")
+            return stale_response
+        retry_after = max(1, math.ceil(e.retry_after or 1))
+        logger.warning(f"AI service unavailable, retry after {retry_after}s")
+        raise HTTPException(status_code=503, detail="AI service is busy. Please try again shortly.", headers={"Retry-After": str(retry_after)})
+    except InferenceTimeout:
         logger.error("Timeout error from AI service")
         raise HTTPException(status_code=504, detail="AI service timeout. Please try again.")
-    except requests.RequestException as e:
+    except InferenceError as e:
         logger.error(f"AI service error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error during summarization: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error during summarization")
+
+@router.post("/batch", response_model=BatchSummarizeResponse)
+@document_store.resolves_documents
+async def summarize_texts(summarize_requests: List[SummarizeRequest]):
+    """Summarize many texts; items are answered from cache where possible and misses are batched upstream"""
+    if not summarize_requests:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(summarize_requests) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is too large. Maximum {MAX_BATCH_ITEMS} items allowed.")
+
+    results = [BatchSummarizeItem(index=i) for i in range(len(summarize_requests))]
+    pending = []  # (index, cache key, content hash)
+
+    for i, summarize_request in enumerate(summarize_requests):
+        error = validate_summarize_request(summarize_request)
+        if error:
+            results[i].error = error
+            continue
+        key = cache.make_key("summarize_text", summarize_request)
+        cached_response = cache.get(key)
+        if cached_response is not None:
+            results[i].summary = cached_response.summary
+            continue
+        pending.append((i, key, summary_hash(summarize_request)))
+
+    # Second-tier lookup for all in-process misses in one query
+    stored = await summary_store.get_many([content_hash for _, _, content_hash in pending])
+    misses = {}  # (max_length, min_length) -> [(index, cache key, content hash)]
+    long_items = []
+    for i, key, content_hash in pending:
+        if content_hash in stored:
+            results[i].summary = stored[content_hash]["summarized_text"]
+            cache.set(key, SummarizeResponse(summary=results[i].summary, usage_count=0, tier="free"))
+        elif len(summarize_requests[i].text) > CHUNK_CHARS:
+            long_items.append((i, key, content_hash))
+        else:
+            params = (summarize_requests[i].max_length, summarize_requests[i].min_length)
+            misses.setdefault(params, []).append((i, key, content_hash))
+
+    if (misses or long_items) and not inference_client.is_configured:
+        logger.error("HuggingFace API key not configured")
+        for items in [*misses.values(), long_items]:
+            for i, _, _ in items:
+                results[i].error = "AI service not configured"
+        return BatchSummarizeResponse(results=results, tier="free")
+
+    def record(i: int, key: str, content_hash: str, summary: str):
+        if not summary.strip():
+            results[i].error = "Failed to generate summary"
+            return
+        results[i].summary = summary
+        cache.set(key, SummarizeResponse(summary=summary, usage_count=0, tier="free"))
+        store_summary(content_hash, summarize_requests[i], summary)
+
+    def record_error(items, e: Exception):
+        if isinstance(e, (InferenceOverloaded, InferenceUnavailable)):
+            message = "AI service is busy. Please try again shortly."
+        elif isinstance(e, InferenceTimeout):
+            message = "AI service timeout. Please try again."
+        else:
+            logger.error(f"AI service error in batch: {str(e)}")
+            message = f"AI service error: {str(e)}"
+        for i, _, _ in items:
+            results[i].error = message
+
+    async def run_batch(params, items):
+        try:
+            summaries = await summarize_chunk_batch([summarize_requests[i].text for i, _, _ in items], *params)
+        except InferenceError as e:
+            record_error(items, e)
+            return
+        for (i, key, content_hash), summary in zip(items, summaries):
+            record(i, key, content_hash, summary)
+
+    async def run_long(item):
+        i, key, content_hash = item
+        summarize_request = summarize_requests[i]
+        try:
+            summary = await summarize_document(
+                summarize_request.text,
+                summarize_request.max_length,
+                summarize_request.min_length
+            )
+        except InferenceError as e:
+            record_error([item], e)
+            return
+        record(i, key, content_hash, summary)
+
+    # Bounded so the batch does not fill the scheduler queue with its own slices
+    await gather_bounded([
+        *(
+            run_batch(params, items[start:start + BATCH_SIZE])
+            for params, items in misses.items()
+            for start in range(0, len(items), BATCH_SIZE)
+        ),
+        *(run_long(item) for item in long_items)
+    ])
+
+    logger.info(f"Batch summarization finished: {len(summarize_requests)} items, {sum(len(v) for v in misses.values()) + len(long_items)} upstream")
+    return BatchSummarizeResponse(results=results, tier="free")
+
+@router.post("/stream")
+@document_store.resolves_documents
+async def summarize_stream(summarize_request: SummarizeRequest):
+    """Stream a summary as Server-Sent Events: `chunk`/`delta` events with partial output, then `summary`"""
+    error = validate_summarize_request(summarize_request)
+    if error:
+        logger.warning(f"Invalid summarization request: {error}")
+        raise HTTPException(status_code=400, detail=error)
+
+    key = cache.make_key("summarize_text", summarize_request)
+    cached_response = cache.get(key)
+    if cached_response is None and not inference_client.is_configured:
+        logger.error("HuggingFace API key not configured")
+        raise HTTPException(status_code=500, detail="AI service not configured")
+
+    async def events():
+        if cached_response is not None:
+            yield "summary", {"summary": cached_response.summary}
+            return
+        content_hash = summary_hash(summarize_request)
+        stored = await summary_store.get(content_hash)
+        if stored is not None:
+            yield "summary", {"summary": stored["summarized_text"]}
+            return
+
+        logger.info(f"Streaming summary of text of length {len(summarize_request.text)}")
+        async for event, data in stream_summary(
+            summarize_request.text,
+            summarize_request.max_length,
+            summarize_request.min_length
+        ):
+            if event == "summary":
+                if not data["summary"].strip():
+                    raise InferenceError("Failed to generate summary")
+                cache.set(key, SummarizeResponse(summary=data["summary"], usage_count=0, tier="free"))
+                store_summary(content_hash, summarize_request, data["summary"])
+            yield event, data
+
+    return event_stream(events(), "AI service")
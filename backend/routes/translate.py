@@ -1,73 +1,74 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import requests
-import os
+from typing import List, Optional
 import logging
+import math
 from cache import cache
+from coalesce import singleflight
+from inference import inference_client, InferenceError, InferenceTimeout, InferenceOverloaded, InferenceUnavailable
+from translator import translate_documents, stream_translation, LANG_MAP
+from streaming import event_stream
+from metrics import TimedRoute
+from documents import document_store
+from etags import conditional
 
-router = APIRouter(prefix="/translate", tags=["Translate"])
+router = APIRouter(prefix="/translate", tags=["Translate"], route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
 class TranslateRequest(BaseModel):
-    text: str
+    text: str = ""
+    document_id: Optional[str] = None  # From POST /upload/; replaces text
     target_language: str = "es"  # Default to Spanish
 
 class TranslateResponse(BaseModel):
     translated_text: str
     tier: str = "free"
 
-HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
-API_URL = "https://api-inference.huggingface.co/models/Helsinki-NLP/opus-mt-en-{target_lang}"
-headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
-
-# Supported languages mapping
-LANG_MAP = {
-    "es": "es",
-    "fr": "fr",
-    "de": "de",
-    "it": "it",
-    "pt": "pt",
-    "zh": "zh",
-    "ja": "ja",
-    "ko": "ko"
-}
+class BatchTranslateItem(BaseModel):
+    index: int
+    translated_text: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchTranslateResponse(BaseModel):
+    results: List[BatchTranslateItem]
+    tier: str = "free"
+
+# Text is translated sentence by sentence through the translation memory, so
+# repeated content is cheap; much longer documents should go through /jobs
+MAX_TEXT_LENGTH = 100_000
+MAX_BATCH_ITEMS = 500
+
+def validate_translate_request(translate_request: TranslateRequest) -> Optional[str]:
+    """Return a validation error message for a translate request, or None if it is valid"""
+    if not translate_request.text or len(translate_request.text.strip()) == 0:
+        return "Text cannot be empty"
+    if len(translate_request.text) > MAX_TEXT_LENGTH:
+        return f"Text is too long. Maximum {MAX_TEXT_LENGTH:,} characters allowed for translation."
+    if translate_request.target_language.lower() not in LANG_MAP:
+        return f"Unsupported language: {translate_request.target_language}. Supported languages: {', '.join(LANG_MAP.keys())}"
+    return None
 
 @router.post("/", response_model=TranslateResponse)
+@document_store.resolves_documents
+@conditional
+@singleflight.coalesced_call
 @cache.cached
 async def translate_text(translate_request: TranslateRequest):
     try:
         # Validate input
-        if not translate_request.text or len(translate_request.text.strip()) == 0:
-            logger.warning("Empty text provided for translation")
-            raise HTTPException(status_code=400, detail="Text cannot be empty")
-
-        if len(translate_request.text) > 5000:  # Reasonable limit for translation
-            logger.warning(f"Text too long for translation: {len(translate_request.text)} characters")
-            raise HTTPException(status_code=400, detail="Text is too long. Maximum 5,000 characters allowed for translation.")
+        error = validate_translate_request(translate_request)
+        if error:
+            logger.warning(f"Invalid translation request: {error}")
+            raise HTTPException(status_code=400, detail=error)
 
         # Validate API key
-        if not HUGGINGFACE_API_KEY:
+        if not inference_client.is_configured:
             logger.error("HuggingFace API key not configured")
             raise HTTPException(status_code=500, detail="Translation service not configured")
 
-        # Validate target language
-        target = LANG_MAP.get(translate_request.target_language.lower(), "es")
-        if translate_request.target_language.lower() not in LANG_MAP:
-            logger.warning(f"Unsupported language requested: {translate_request.target_language}")
-            raise HTTPException(status_code=400, detail=f"Unsupported language: {translate_request.target_language}. Supported languages: {', '.join(LANG_MAP.keys())}")
-
-        url = API_URL.format(target_lang=target)
-        payload = {"inputs": translate_request.text}
-
+        target = translate_request.target_language.lower()
         logger.info(f"Translating text to {target}, length: {len(translate_request.text)}")
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-
-        if isinstance(result, list) and result:
-            translation = result[0].get("translation_text", "")
-        else:
-            translation = str(result)
+        translation = (await translate_documents([translate_request.text], target))[0]
 
         if not translation.strip():
             logger.error("Empty translation returned from AI service")
@@ -76,12 +77,116 @@ async def translate_text(translate_request: TranslateRequest):
         logger.info(f"Translation generated successfully, length: {len(translation)}")
         return TranslateResponse(translated_text=translation, tier="free")
 
-    except requests.Timeout:
+    except HTTPException:
+        raise
+    except (InferenceOverloaded, InferenceUnavailable) as e:
+        # Serve an expired translation rather than failing while the model is unavailable
+        stale_response = cache.get_stale(cache.make_key("translate_text", translate_request))
+        if stale_response is not None:
+            logger.warning(f"Translation service unavailable, serving stale translation: {str(e)}")
+            return stale_response
+        retry_after = max(1, math.ceil(e.retry_after or 1))
+        logger.warning(f"Translation service unavailable, retry after {retry_after}s")
+        raise HTTPException(status_code=503, detail="Translation service is busy. Please try again shortly.", headers={"Retry-After": str(retry_after)})
+    except InferenceTimeout:
         logger.error("Timeout error from translation service")
         raise HTTPException(status_code=504, detail="Translation service timeout. Please try again.")
-    except requests.RequestException as e:
+    except InferenceError as e:
         logger.error(f"Translation service error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Translation service error: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error during translation: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error during translation")
+
+@router.post("/batch", response_model=BatchTranslateResponse)
+@document_store.resolves_documents
+async def translate_texts(translate_requests: List[TranslateRequest]):
+    """Translate many texts; items are answered from cache where possible and misses are batched upstream"""
+    if not translate_requests:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(translate_requests) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is too large. Maximum {MAX_BATCH_ITEMS} items allowed.")
+
+    results = [BatchTranslateItem(index=i) for i in range(len(translate_requests))]
+    misses = {}  # target language -> [(index, cache key)]
+
+    for i, translate_request in enumerate(translate_requests):
+        error = validate_translate_request(translate_request)
+        if error:
+            results[i].error = error
+            continue
+        key = cache.make_key("translate_text", translate_request)
+        cached_response = cache.get(key)
+        if cached_response is not None:
+            results[i].translated_text = cached_response.translated_text
+            continue
+        misses.setdefault(translate_request.target_language.lower(), []).append((i, key))
+
+    if misses and not inference_client.is_configured:
+        logger.error("HuggingFace API key not configured")
+        for items in misses.values():
+            for i, _ in items:
+                results[i].error = "Translation service not configured"
+        return BatchTranslateResponse(results=results, tier="free")
+
+    async def run_batch(target: str, items):
+        try:
+            translations = await translate_documents([translate_requests[i].text for i, _ in items], target)
+        except (InferenceOverloaded, InferenceUnavailable):
+            for i, _ in items:
+                results[i].error = "Translation service is busy. Please try again shortly."
+            return
+        except InferenceTimeout:
+            for i, _ in items:
+                results[i].error = "Translation service timeout. Please try again."
+            return
+        except InferenceError as e:
+            logger.error(f"Translation service error in batch: {str(e)}")
+            for i, _ in items:
+                results[i].error = f"Translation service error: {str(e)}"
+            return
+        for (i, key), translation in zip(items, translations):
+            if not translation.strip():
+                results[i].error = "Failed to generate translation"
+                continue
+            results[i].translated_text = translation
+            cache.set(key, TranslateResponse(translated_text=translation, tier="free"))
+
+    # One call per language: translate_documents deduplicates sentences across
+    # the texts and bounds its own fan-out into the scheduler
+    for target, items in misses.items():
+        await run_batch(target, items)
+
+    logger.info(f"Batch translation finished: {len(translate_requests)} items, {sum(len(v) for v in misses.values())} upstream")
+    return BatchTranslateResponse(results=results, tier="free")
+
+@router.post("/stream")
+@document_store.resolves_documents
+async def translate_stream(translate_request: TranslateRequest):
+    """Stream a translation as Server-Sent Events: `chunk`/`delta` events with partial output, then `translation`"""
+    error = validate_translate_request(translate_request)
+    if error:
+        logger.warning(f"Invalid translation request: {error}")
+        raise HTTPException(status_code=400, detail=error)
+
+    key = cache.make_key("translate_text", translate_request)
+    cached_response = cache.get(key)
+    if cached_response is None and not inference_client.is_configured:
+        logger.error("HuggingFace API key not configured")
+        raise HTTPException(status_code=500, detail="Translation service not configured")
+
+    async def events():
+        if cached_response is not None:
+            yield "translation", {"translated_text": cached_response.translated_text}
+            return
+
+        target = translate_request.target_language.lower()
+        logger.info(f"Streaming translation to {target}, length: {len(translate_request.text)}")
+        async for event, data in stream_translation(translate_request.text, target):
+            if event == "translation":
+                if not data["translated_text"].strip():
+                    raise InferenceError("Failed to generate translation")
+                cache.set(key, TranslateResponse(translated_text=data["translated_text"], tier="free"))
+            yield event, data
+
+    return event_stream(events(), "Translation service")
@@ -1,43 +1,72 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from models import UploadResponse
+from extractors import extract_text, get_extension, supported_extensions, ExtractionError
+from metrics import TimedRoute, stage, upload_bytes
+from documents import document_store
 import logging
 
-router = APIRouter(prefix="/upload", tags=["Upload"])
+router = APIRouter(prefix="/upload", tags=["Upload"], route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Characters of extracted text returned as a preview when the full content is left out
+PREVIEW_LENGTH = 2000
+
 @router.post("/", response_model=UploadResponse)
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), include_content: bool = True):
+    """Extract a file's text; with include_content=false only a preview and the document id are returned"""
     try:
         # Validate file type
-        allowed_extensions = ['.txt', '.md', '.docx', '.pdf', '.csv', '.xlsx', '.pptx']
-        if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
+        extension = get_extension(file.filename or "")
+        if extension is None:
             logger.warning(f"Invalid file type attempted: {file.filename}")
-            raise HTTPException(status_code=400, detail=f"Only {', '.join(allowed_extensions)} files are allowed")
+            raise HTTPException(status_code=400, detail=f"Only {', '.join(supported_extensions())} files are allowed")
+
+        # Check file size (max 10MB), reading the spooled upload in chunks and aborting early
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            logger.warning(f"File too large: {file.filename} ({file.size} bytes)")
+            raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
 
-        # Read file content
-        content = await file.read()
-        text_content = content.decode("utf-8")
+        file_size = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            file_size += len(chunk)
+            if file_size > MAX_FILE_SIZE:
+                logger.warning(f"File too large: {file.filename} (over {MAX_FILE_SIZE} bytes)")
+                raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
+        await file.seek(0)
+
+        # Extract text in a worker thread so parsing large documents does not block the event loop
+        with stage("extraction"):
+            text_content = await run_in_threadpool(extract_text, file.file, extension)
 
         # Basic validation
         if len(text_content.strip()) == 0:
             logger.warning(f"Empty file uploaded: {file.filename}")
             raise HTTPException(status_code=400, detail="File is empty")
 
-        # Check file size (max 10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if len(content) > max_size:
-            logger.warning(f"File too large: {file.filename} ({len(content)} bytes)")
-            raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
+        # Later requests can pass the document id instead of sending the text back
+        document_id = document_store.save(text_content)
 
-        logger.info(f"File uploaded successfully: {file.filename} ({len(content)} bytes)")
+        upload_bytes.observe(file_size)
+        logger.info(f"File uploaded successfully: {file.filename} ({file_size} bytes), document {document_id}")
         return UploadResponse(
             filename=file.filename,
-            content=text_content,
-            file_size=len(content)
+            content=text_content if include_content else None,
+            preview=None if include_content else text_content[:PREVIEW_LENGTH],
+            document_id=document_id,
+            text_length=len(text_content),
+            file_size=file_size
         )
+    except HTTPException:
+        raise
     except UnicodeDecodeError:
         logger.error(f"Encoding error for file: {file.filename}")
         raise HTTPException(status_code=400, detail="File encoding not supported. Please use UTF-8 encoded text files.")
+    except ExtractionError as e:
+        logger.error(f"Extraction error for file {file.filename}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error during file upload: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error during file processing")
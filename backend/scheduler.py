@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+Dispatch = Callable[[Hashable, List[Any]], Awaitable[List[Any]]]
+
+
+class QueueFullError(Exception):
+    """Raised when a scheduler queue is over its limit; callers should retry later"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Group:
+    """Items queued for one dispatch group (e.g. one parameter set)"""
+
+    def __init__(self):
+        self.items: List[Tuple[List[Any], asyncio.Future]] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class BatchScheduler:
+    """Dynamic micro-batching queue for one model.
+
+    Submitted items are grouped by a hashable key (typically the generation
+    parameters). A group is dispatched as one batch as soon as it holds
+    `max_batch_size` items or `max_wait_ms` after its first item arrived,
+    whichever comes first; results are fanned back out to the waiting callers
+    in order. A submission that does not fit the current group is split
+    across batches, so no batch is larger than `max_batch_size`. Submissions
+    are rejected with QueueFullError once more than `max_queue` items are
+    queued or in flight, except when the queue is empty.
+    """
+
+    def __init__(self, name: str, dispatch: Dispatch, max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, max_queue: int = 256):
+        self.name = name
+        self.dispatch = dispatch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self._groups: Dict[Hashable, _Group] = {}
+        self._tasks: set = set()
+        self.queued = 0
+        self.in_flight = 0
+        self.batches = 0
+        self.items_dispatched = 0
+        self.rejected = 0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        # Exponential moving average of batch duration, used for Retry-After
+        self._avg_batch_seconds = 1.0
+
+    def retry_after(self) -> int:
+        """Estimate how long until the current backlog has drained"""
+        backlog_batches = (self.queued + self.in_flight) / max(self.max_batch_size, 1)
+        return max(1, math.ceil(backlog_batches * self._avg_batch_seconds))
+
+    async def submit(self, group_key: Hashable, items: List[Any]) -> List[Any]:
+        """Queue items and wait for their results"""
+        if self.queued + self.in_flight + len(items) > self.max_queue and (self.queued or self.in_flight):
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        start = 0
+        while start < len(items):
+            group = self._groups.get(group_key)
+            if group is None:
+                group = _Group()
+                self._groups[group_key] = group
+            # Take only what fits; the rest starts the next batch
+            piece = items[start:start + self.max_batch_size - group.size]
+            future = loop.create_future()
+            group.items.append((piece, future))
+            group.size += len(piece)
+            self.queued += len(piece)
+            futures.append(future)
+            start += len(piece)
+
+            if group.size >= self.max_batch_size:
+                self._flush(group_key)
+            elif group.timer is None:
+                group.timer = loop.call_later(self.max_wait, self._flush, group_key)
+
+        # Wait for every piece so a failed one does not leave the others' errors unretrieved
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return [output for result in results for output in result]
+
+    def _flush(self, group_key: Hashable):
+        group = self._groups.pop(group_key, None)
+        if group is None:
+            return
+        if group.timer is not None:
+            group.timer.cancel()
+        self.queued -= group.size
+        self.in_flight += group.size
+        task = asyncio.ensure_future(self._run(group_key, group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _record_batch(self, size: int):
+        self.batches += 1
+        self.items_dispatched += size
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self.batch_size_counts[i] += 1
+                return
+        self.batch_size_counts[-1] += 1
+
+    async def _run(self, group_key: Hashable, group: _Group):
+        flat = [item for items, _ in group.items for item in items]
+        self._record_batch(len(flat))
+        started = time.monotonic()
+        try:
+            outputs = await self.dispatch(group_key, flat)
+            if len(outputs) != len(flat):
+                raise ValueError(f"{self.name} returned {len(outputs)} results for {len(flat)} inputs")
+        except Exception as e:
+            for _, future in group.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.in_flight -= group.size
+            elapsed = time.monotonic() - started
+            self._avg_batch_seconds = 0.8 * self._avg_batch_seconds + 0.2 * elapsed
+
+        offset = 0
+        for items, future in group.items:
+            if not future.done():
+                future.set_result(outputs[offset:offset + len(items)])
+            offset += len(items)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "batches": self.batches,
+            "items": self.items_dispatched,
+            "avg_batch_size": round(self.items_dispatched / self.batches, 2) if self.batches else 0,
+            "rejected": self.rejected,
+            "batch_size_histogram": {
+                **{f"le_{bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, self.batch_size_counts)},
+                f"gt_{BATCH_SIZE_BUCKETS[-1]}": self.batch_size_counts[-1],
+            },
+        }
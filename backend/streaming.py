@@ -0,0 +1,44 @@
+import json
+import logging
+import math
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from inference import InferenceError, InferenceOverloaded, InferenceTimeout, InferenceUnavailable
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop reverse proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _encode(events: AsyncIterator[Tuple[str, Dict[str, Any]]], service: str) -> AsyncIterator[str]:
+    try:
+        async for event, data in events:
+            yield sse_event(event, data)
+    except (InferenceOverloaded, InferenceUnavailable) as e:
+        yield sse_event("error", {"detail": f"{service} is busy. Please try again shortly.", "retry_after": max(1, math.ceil(e.retry_after or 1))})
+    except InferenceTimeout:
+        logger.error(f"Timeout error from {service} while streaming")
+        yield sse_event("error", {"detail": f"{service} timeout. Please try again."})
+    except InferenceError as e:
+        logger.error(f"{service} error while streaming: {str(e)}")
+        yield sse_event("error", {"detail": f"{service} error: {str(e)}"})
+    except Exception as e:
+        logger.error(f"Unexpected error while streaming: {str(e)}")
+        yield sse_event("error", {"detail": "Internal server error"})
+    yield sse_event("done", {})
+
+
+def event_stream(events: AsyncIterator[Tuple[str, Dict[str, Any]]], service: str) -> StreamingResponse:
+    """Stream (event, data) pairs as Server-Sent Events, reporting failures as an `error` event"""
+    return StreamingResponse(_encode(events, service), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from cache import cache, cache_key
+from chunking import chunk_text
+from inference import inference_client, InferenceError, SUMMARIZE_MODEL
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+# bart-large-cnn accepts ~1024 tokens, roughly 3,000 characters of English prose
+CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "3000"))
+CHUNK_MAX_LENGTH = 150
+CHUNK_MIN_LENGTH = 30
+MAX_PARALLEL_CHUNKS = int(os.getenv("SUMMARY_MAX_PARALLEL_CHUNKS", "4"))
+MAX_REDUCE_ROUNDS = 8
+
+
+def parse_summary(result) -> str:
+    """Extract the summary text from a summarization model response"""
+    if isinstance(result, list) and result:
+        return result[0].get("summary_text", "")
+    return str(result)
+
+
+def _payload(inputs, max_length: int, min_length: int) -> dict:
+    return {
+        "inputs": inputs,
+        "parameters": {
+            "max_length": max_length,
+            "min_length": min_length,
+            "do_sample": False
+        }
+    }
+
+
+async def summarize_chunk(text: str, max_length: int, min_length: int) -> str:
+    """Summarize a single model-sized chunk, cached by the chunk content"""
+    key = cache_key("summarize_chunk", text, max_length, min_length)
+    cached_summary = cache.get(key)
+    if cached_summary is not None:
+        return cached_summary
+
+    with stage("upstream"):
+        summary = parse_summary(await inference_client.query(SUMMARIZE_MODEL, _payload(text, max_length, min_length)))
+    if summary.strip():
+        cache.set(key, summary)
+    return summary
+
+
+async def summarize_chunk_batch(texts: List[str], max_length: int, min_length: int) -> List[str]:
+    """Summarize several model-sized chunks with one upstream call for the uncached ones"""
+    keys = [cache_key("summarize_chunk", text, max_length, min_length) for text in texts]
+    summaries = [cache.get(key) for key in keys]
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if not missing:
+        return summaries
+
+    inputs = [texts[i] for i in missing]
+    with stage("upstream"):
+        result = await inference_client.query(SUMMARIZE_MODEL, _payload(inputs, max_length, min_length))
+    if not isinstance(result, list) or len(result) != len(inputs):
+        raise InferenceError(f"Expected {len(inputs)} summaries from batch request")
+    for i, item in zip(missing, result):
+        summary = item.get("summary_text", "") if isinstance(item, dict) else str(item)
+        summaries[i] = summary
+        if summary.strip():
+            cache.set(keys[i], summary)
+    return summaries
+
+
+async def _summarize_chunks(chunks: List[str]) -> List[str]:
+    """Map step: summarize chunks concurrently with bounded parallelism"""
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+
+    async def run(chunk: str) -> str:
+        async with semaphore:
+            return await summarize_chunk(chunk, CHUNK_MAX_LENGTH, CHUNK_MIN_LENGTH)
+
+    return await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+
+async def summarize_document(text: str, max_length: int, min_length: int) -> str:
+    """Summarize text of any length.
+
+    Text that does not fit the model is split at paragraph/sentence boundaries,
+    the chunks are summarized concurrently, and the joined partial summaries are
+    reduced again until they fit into a single final summarization call. If
+    MAX_REDUCE_ROUNDS runs out or a round stops shrinking the text, the final
+    call gets only the leading model-sized chunk of what is left.
+    """
+    for round_number in range(MAX_REDUCE_ROUNDS):
+        if len(text) <= CHUNK_CHARS:
+            break
+        chunks = chunk_text(text, CHUNK_CHARS)
+        logger.info(f"Reduce round {round_number + 1}: summarizing {len(chunks)} chunks")
+        partials = await _summarize_chunks(chunks)
+        reduced = "\n\n".join(p.strip() for p in partials if p.strip())
+        if not reduced or len(reduced) >= len(text):
+            logger.warning("Chunk summaries did not shrink the text, stopping reduction")
+            break
+        text = reduced
+
+    if len(text) > CHUNK_CHARS:
+        logger.warning(f"Reduced text is still {len(text)} characters, summarizing its first {CHUNK_CHARS}")
+        text = chunk_text(text, CHUNK_CHARS)[0]
+    return await summarize_chunk(text, max_length, min_length)
+
+
+async def stream_summary(text: str, max_length: int, min_length: int) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Summarize text, yielding (event, data) pairs as partial output becomes available.
+
+    Long documents emit a `chunk` event as each first-round chunk summary
+    completes; text that fits one model call streams `delta` events from the
+    backend. Both end with a `summary` event carrying the final summary.
+    """
+    if len(text) > CHUNK_CHARS:
+        chunks = chunk_text(text, CHUNK_CHARS)
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+
+        async def run(index: int, chunk: str) -> Tuple[int, str]:
+            async with semaphore:
+                return index, await summarize_chunk(chunk, CHUNK_MAX_LENGTH, CHUNK_MIN_LENGTH)
+
+        tasks = [asyncio.ensure_future(run(i, chunk)) for i, chunk in enumerate(chunks)]
+        partials = [""] * len(chunks)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, partial = await next_done
+                partials[index] = partial
+                yield "chunk", {"index": index, "total": len(chunks), "summary": partial}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # Later rounds and the final pass reuse the chunk summaries cached above
+        yield "summary", {"summary": await summarize_document(text, max_length, min_length)}
+        return
+
+    key = cache_key("summarize_chunk", text, max_length, min_length)
+    summary = cache.get(key)
+    if summary is None:
+        pieces = []
+        async for piece in inference_client.stream(SUMMARIZE_MODEL, _payload(text, max_length, min_length)):
+            pieces.append(piece)
+            yield "delta", {"text": piece}
+        summary = "".join(pieces)
+        if summary.strip():
+            cache.set(key, summary)
+    yield "summary", {"summary": summary}
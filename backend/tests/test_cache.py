@@ -0,0 +1,49 @@
+import asyncio
+
+from pydantic import BaseModel
+
+import cache as cache_module
+from cache import DIGEST_MIN_CHARS, LRUCache, cache_key, request_key
+
+
+class Request(BaseModel):
+    text: str
+    max_length: int = 150
+
+
+def test_long_strings_are_keyed_by_digest():
+    text = "x" * DIGEST_MIN_CHARS
+    assert cache_key("ns", Request(text=text)) == cache_key("ns", Request(text=text))
+    assert cache_key("ns", Request(text=text)) != cache_key("ns", Request(text=text + "y"))
+    assert cache_key("ns", Request(text=text)) != cache_key("ns", Request(text=text, max_length=60))
+
+
+def test_request_key_is_computed_once_per_call(monkeypatch):
+    calls = []
+    original = cache_module.cache_key
+    monkeypatch.setattr(cache_module, "cache_key", lambda *args: calls.append(args) or original(*args))
+    request = Request(text="The nucleus stores genetic material.")
+
+    async def inner_layer():
+        return request_key("summarize_text", request)
+
+    async def handle():
+        first = request_key("summarize_text", request)
+        # Inner layers of the same request reuse the key, including from tasks it starts
+        inner = await asyncio.ensure_future(inner_layer())
+        other = request_key("summarize_text", Request(text=request.text))
+        return first, inner, other
+
+    first, inner, other = asyncio.run(handle())
+    assert first == inner == other
+    # An equal but distinct request object is hashed again
+    assert len(calls) == 2
+
+
+def test_oversized_value_replaces_the_previous_entry():
+    cache = LRUCache(max_bytes=10)
+    cache.set("key", "old")
+    cache.set("key", "a value far over the byte limit")
+    assert cache.get("key") is None
+    assert cache.get_stale("key") is None
+    assert len(cache) == 0 and cache.current_bytes == 0
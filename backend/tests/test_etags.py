@@ -0,0 +1,76 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from cache import cache
+from etags import conditional, etag_matches, make_etag
+
+KEY = "0f" * 32
+
+
+@pytest.mark.parametrize("header", [
+    f'"{KEY}"',
+    f'W/"{KEY}"',
+    f'"{KEY}-br"',
+    f'"{KEY}-gzip"',
+    f'W/"{KEY}-gzip"',
+    f'"other", "{KEY}-br"',
+])
+def test_matching_tags(header):
+    assert etag_matches(header, KEY, exists=False)
+
+
+@pytest.mark.parametrize("header", [None, "", '"other"', f'"{KEY[:-1]}"', f'"{KEY}0-br"'])
+def test_non_matching_tags(header):
+    assert not etag_matches(header, KEY, exists=True)
+
+
+def test_wildcard_matches_only_an_existing_representation():
+    assert etag_matches("*", KEY, exists=True)
+    assert not etag_matches("*", KEY, exists=False)
+    assert etag_matches(f'*, "{KEY}"', KEY, exists=False)
+
+
+class EchoRequest(BaseModel):
+    text: str
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/echo/")
+    @conditional
+    @cache.cached
+    async def echo(echo_request: EchoRequest):
+        if not echo_request.text:
+            raise HTTPException(status_code=400, detail="Text cannot be empty")
+        return {"text": echo_request.text}
+
+    cache.clear()
+    yield TestClient(app)
+    cache.clear()
+
+
+def test_wildcard_on_uncached_request_runs_the_endpoint(client):
+    assert client.post("/echo/", json={"text": ""}, headers={"If-None-Match": "*"}).status_code == 400
+    response = client.post("/echo/", json={"text": "hello"}, headers={"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert response.json() == {"text": "hello"}
+
+
+def test_wildcard_on_cached_request_is_not_modified(client):
+    etag = client.post("/echo/", json={"text": "hello"}).headers["etag"]
+    response = client.post("/echo/", json={"text": "hello"}, headers={"If-None-Match": "*"})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_compressed_etag_is_echoed_back(client):
+    etag = client.post("/echo/", json={"text": "hello"}).headers["etag"]
+    suffixed = f'W/{etag[:-1]}-br"'
+    response = client.post("/echo/", json={"text": "hello"}, headers={"If-None-Match": suffixed})
+    assert response.status_code == 304
+    assert response.headers["etag"] == suffixed.removeprefix("W/")
+    assert make_etag(etag.strip('"')) == etag
@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+import pytest
+
+from inference import (InferenceError, InferenceOverloaded, InferenceRequestError, InstrumentedBackend,
+                       RemoteBackend, ResilientBackend)
+
+MODEL = "facebook/bart-large-cnn"
+
+
+def backend_answering(status_code: int) -> ResilientBackend:
+    """The production wrapper chain over a remote backend whose upstream always answers status_code"""
+    remote = RemoteBackend(api_key="test", base_url="http://upstream")
+    remote._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(status_code, json={"error": "upstream says no"})
+    ))
+    return ResilientBackend(InstrumentedBackend(remote), attempts=1, failure_threshold=3, warmup_models=[])
+
+
+async def query_repeatedly(backend: ResilientBackend, times: int):
+    errors = []
+    for _ in range(times):
+        with pytest.raises(InferenceError) as error:
+            await backend.query(MODEL, {"inputs": "text"})
+        errors.append(error.value)
+    await backend.close()
+    return errors
+
+
+@pytest.mark.parametrize("status_code", [400, 404, 413, 422])
+def test_client_errors_leave_the_breaker_closed(status_code):
+    backend = backend_answering(status_code)
+    errors = asyncio.run(query_repeatedly(backend, 10))
+
+    assert all(isinstance(error, InferenceRequestError) for error in errors)
+    assert backend.breaker_states() == {MODEL: "closed"}
+
+
+@pytest.mark.parametrize("status_code", [500, 501])
+def test_server_errors_open_the_breaker(status_code):
+    backend = backend_answering(status_code)
+    errors = asyncio.run(query_repeatedly(backend, 4))
+
+    assert not any(isinstance(error, InferenceRequestError) for error in errors[:3])
+    # The fourth call is refused without reaching upstream
+    assert isinstance(errors[3], InferenceOverloaded)
+    assert backend.breaker_states() == {MODEL: "open"}
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from persistence import JobStore, ResultStore
+
+
+@pytest.fixture
+def database():
+    return AsyncMongoMockClient()["edusummarizer_test"]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_disabled_store_is_a_no_op():
+    store = ResultStore(None)
+    store.put("a", {"summary": "x"})
+
+    async def scenario():
+        await store.start()
+        await store.flush()
+        assert await store.get("a") is None
+        assert await store.get_many(["a"]) == {}
+        await store.stop()
+    run(scenario())
+
+
+def test_put_is_readable_before_and_after_flush(database):
+    store = ResultStore(database.summaries, batch_size=10, flush_interval=60)
+
+    async def scenario():
+        await store.ensure_indexes()
+        store.put("a", {"summary": "first"})
+        store.put("b", {"summary": "second"})
+        # Queued results are served from memory before they are written
+        assert (await store.get("a"))["summary"] == "first"
+        assert await database.summaries.count_documents({}) == 0
+
+        await store.flush()
+        assert await database.summaries.count_documents({}) == 2
+        assert await store.get("a") == {"summary": "first", "content_hash": "a"}
+        assert await store.get("missing") is None
+        found = await store.get_many(["a", "b", "missing"])
+        assert {h: doc["summary"] for h, doc in found.items()} == {"a": "first", "b": "second"}
+    run(scenario())
+
+
+def test_get_many_combines_pending_and_stored(database):
+    store = ResultStore(database.summaries, batch_size=10, flush_interval=60)
+
+    async def scenario():
+        store.put("a", {"summary": "stored"})
+        await store.flush()
+        store.put("b", {"summary": "pending"})
+        found = await store.get_many(["a", "b"])
+        assert {h: doc["summary"] for h, doc in found.items()} == {"a": "stored", "b": "pending"}
+        assert await store.get_many([]) == {}
+    run(scenario())
+
+
+def test_duplicate_content_hash_is_ignored(database):
+    # Two workers computing the same result both write it; the unique index keeps one
+    first = ResultStore(database.summaries, batch_size=10, flush_interval=60)
+    second = ResultStore(database.summaries, batch_size=10, flush_interval=60)
+
+    async def scenario():
+        await first.ensure_indexes()
+        first.put("a", {"summary": "from first"})
+        first.put("a", {"summary": "from first, again"})
+        await first.flush()
+        second.put("a", {"summary": "from second"})
+        second.put("b", {"summary": "only in second"})
+        await second.flush()
+
+        assert await database.summaries.count_documents({"content_hash": "a"}) == 1
+        assert (await first.get("a"))["summary"] == "from first, again"
+        # The rest of an unordered batch is still written
+        assert (await first.get("b"))["summary"] == "only in second"
+    run(scenario())
+
+
+def test_background_writer_flushes_full_batches_and_on_stop(database):
+    store = ResultStore(database.summaries, batch_size=2, flush_interval=60)
+
+    async def scenario():
+        await store.start()
+        store.put("a", {"summary": "1"})
+        store.put("b", {"summary": "2"})
+        for _ in range(50):
+            if await database.summaries.count_documents({}) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert await database.summaries.count_documents({}) == 2
+
+        store.put("c", {"summary": "3"})
+        await store.stop()
+        assert await database.summaries.count_documents({}) == 3
+    run(scenario())
+
+
+def test_job_store_upserts(database):
+    store = JobStore(database.jobs)
+
+    async def scenario():
+        await store.ensure_indexes()
+        await store.save({"job_id": "j1", "status": "queued"})
+        await store.save({"job_id": "j1", "status": "completed", "results": {"summary": "x"}})
+        assert await database.jobs.count_documents({}) == 1
+        assert await store.get("j1") == {"job_id": "j1", "status": "completed", "results": {"summary": "x"}}
+        assert await store.get("missing") is None
+        assert await JobStore(None).get("j1") is None
+    run(scenario())
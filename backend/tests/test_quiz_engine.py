@@ -0,0 +1,57 @@
+from cache import LRUCache
+from quiz_engine import BLANK, _candidate_runs, analyze, generate_questions
+
+TEXT = (
+    "Photosynthesis converts light energy in Plant Cells. Chlorophyll absorbs sunlight. "
+    "The Calvin cycle fixes carbon dioxide. Mitochondria release energy."
+)
+
+
+def assert_answerable(questions):
+    for question, answer, options in questions:
+        blanked = question.removeprefix("Fill in the blank: ")
+        assert BLANK in blanked
+        # Some content words are left to answer from
+        assert _candidate_runs(blanked.replace(BLANK, ""))
+        assert answer in options
+
+
+def test_whole_sentence_phrases_are_not_blanked_out():
+    for text in ["Chlorophyll absorbs sunlight.", "First para.\n\nSecond para.", TEXT]:
+        questions = generate_questions(text, 4, seed=1)
+        assert all(question != f"Fill in the blank: {BLANK}." for question, _, _ in questions)
+        assert_answerable(questions)
+
+
+def test_single_sentence_still_gets_a_question():
+    (question, answer, _), = generate_questions("Chlorophyll absorbs sunlight.", 1, seed=1)
+    assert question == f"Fill in the blank: Chlorophyll {BLANK}."
+    assert answer == "absorbs sunlight"
+
+
+def test_answers_and_options_keep_source_casing():
+    questions = generate_questions(TEXT, 4, seed=1)
+    answers = {answer for _, answer, _ in questions}
+    assert "Photosynthesis converts light" in answers
+    for _, answer, options in questions:
+        for option in options:
+            assert option in TEXT or option in ("None of the above", "All of the above", "Not mentioned in the text")
+
+
+def test_long_runs_give_one_window_without_orphans():
+    questions = generate_questions("The nucleus stores genetic material. Ribosomes build proteins.", 4, seed=1)
+    answers = [answer for _, answer, _ in questions]
+    assert "material" not in answers
+    assert "nucleus stores genetic" not in answers
+
+
+def test_analysis_size_counts_its_arrays():
+    analysis = analyze(TEXT)
+    assert analysis.nbytes >= analysis.similarity.nbytes + len("".join(analysis.sentences))
+
+    other = analyze(TEXT + " Ribosomes build proteins.")
+    cache = LRUCache(max_bytes=analysis.nbytes + other.nbytes - 1)
+    cache.set("a", analysis)
+    cache.set("b", other)
+    assert cache.get("a") is None
+    assert cache.get("b") is other
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from scheduler import BatchScheduler, QueueFullError
+
+
+class RecordingDispatch:
+    """Dispatch function recording each batch and echoing its items back transformed"""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    async def __call__(self, group_key, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0.001)
+        if self.fail_on is not None and self.fail_on in items:
+            raise RuntimeError("upstream failed")
+        return [item * 10 for item in items]
+
+
+def test_oversized_submission_is_split_and_every_future_resolves():
+    dispatch = RecordingDispatch()
+    scheduler = BatchScheduler("test", dispatch, max_batch_size=16, max_wait_ms=1, max_queue=256)
+
+    async def scenario():
+        small = asyncio.ensure_future(scheduler.submit("params", list(range(15))))
+        await asyncio.sleep(0)
+        large = await scheduler.submit("params", list(range(100, 140)))
+        return await small, large
+
+    small, large = asyncio.run(scenario())
+    assert small == [item * 10 for item in range(15)]
+    assert large == [item * 10 for item in range(100, 140)]
+    assert [len(batch) for batch in dispatch.batches] == [16, 16, 16, 7]
+    assert all(len(batch) <= scheduler.max_batch_size for batch in dispatch.batches)
+    assert scheduler.queued == 0 and scheduler.in_flight == 0
+
+
+def test_failed_piece_fails_the_whole_submission():
+    dispatch = RecordingDispatch(fail_on=20)
+    scheduler = BatchScheduler("test", dispatch, max_batch_size=8, max_wait_ms=1)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await scheduler.submit("params", list(range(24)))
+        # The scheduler keeps working after a failed batch
+        return await scheduler.submit("params", [1, 2])
+
+    assert asyncio.run(scenario()) == [10, 20]
+    assert scheduler.queued == 0 and scheduler.in_flight == 0
+
+
+def test_submission_over_the_queue_limit_is_rejected_when_busy():
+    dispatch = RecordingDispatch()
+    scheduler = BatchScheduler("test", dispatch, max_batch_size=4, max_wait_ms=50, max_queue=10)
+
+    async def scenario():
+        first = asyncio.ensure_future(scheduler.submit("params", [1, 2, 3]))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await scheduler.submit("params", list(range(8)))
+        # An empty scheduler admits an oversized submission and splits it
+        assert await first == [10, 20, 30]
+        return await scheduler.submit("params", list(range(12)))
+
+    assert asyncio.run(scenario()) == [item * 10 for item in range(12)]
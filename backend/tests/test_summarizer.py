@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+import summarizer
+from cache import cache
+from summarizer import CHUNK_CHARS, summarize_document
+
+PARAGRAPH = "The nucleus stores genetic material and controls the activities of the cell. " * 20
+
+
+class EchoBackend:
+    """Stands in for the inference client; 'summarizes' by returning the input unchanged"""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def query(self, model, payload):
+        self.inputs.append(payload["inputs"])
+        return [{"summary_text": payload["inputs"]}]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = EchoBackend()
+    monkeypatch.setattr(summarizer, "inference_client", backend)
+    cache.clear()
+    yield backend
+    cache.clear()
+
+
+def test_text_that_does_not_shrink_is_cut_to_one_model_call(backend):
+    text = "\n\n".join([PARAGRAPH] * 10)
+    summary = asyncio.run(summarize_document(text, 150, 50))
+
+    assert all(len(inputs) <= CHUNK_CHARS for inputs in backend.inputs)
+    assert len(summary) <= CHUNK_CHARS
+    assert summary.startswith("The nucleus stores genetic material")
+
+
+def test_text_still_too_long_after_the_last_round_is_cut(backend, monkeypatch):
+    monkeypatch.setattr(summarizer, "MAX_REDUCE_ROUNDS", 0)
+    asyncio.run(summarize_document("\n\n".join([PARAGRAPH] * 3), 150, 50))
+
+    assert len(backend.inputs) == 1
+    assert len(backend.inputs[0]) <= CHUNK_CHARS
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+import translator
+from chunking import split_line_sentences
+from translation_memory import translation_memory
+
+
+class RecordingBackend:
+    """Stands in for the inference client, recording the inputs sent upstream"""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def query(self, model, payload):
+        texts = payload["inputs"] if isinstance(payload["inputs"], list) else [payload["inputs"]]
+        self.inputs.extend(texts)
+        return [{"translation_text": text.upper()} for text in texts]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(translator, "inference_client", backend)
+    translation_memory.clear()
+    yield backend
+    translation_memory.clear()
+
+
+def test_soft_line_wraps_are_joined_into_sentences():
+    assert split_line_sentences("The cell nucleus stores\ngenetic material and\ncontrols the cell. It is large.", 1000) == [
+        ["The cell nucleus stores genetic material and controls the cell.", "It is large."],
+    ]
+
+
+def test_list_items_stay_separate_lines():
+    paragraph = "Organelles:\n- The nucleus stores\n  genetic material.\n- Ribosomes build proteins.\n2) Mitochondria\nrelease energy."
+    assert split_line_sentences(paragraph, 1000) == [
+        ["Organelles:"],
+        ["- The nucleus stores genetic material."],
+        ["- Ribosomes build proteins."],
+        ["2) Mitochondria release energy."],
+    ]
+
+
+def test_hard_wrapped_text_is_translated_as_whole_sentences(backend):
+    text = "The cell nucleus stores\ngenetic material and\ncontrols the cell.\n\nRibosomes build\nproteins."
+    translation, = asyncio.run(translator.translate_documents([text], "es"))
+
+    assert backend.inputs == [
+        "The cell nucleus stores genetic material and controls the cell.",
+        "Ribosomes build proteins.",
+    ]
+    assert translation == "THE CELL NUCLEUS STORES GENETIC MATERIAL AND CONTROLS THE CELL.\n\nRIBOSOMES BUILD PROTEINS."
+
+
+def test_rewrapped_text_hits_the_translation_memory(backend):
+    asyncio.run(translator.translate_documents(["The cell nucleus stores\ngenetic material."], "es"))
+    asyncio.run(translator.translate_documents(["The cell\nnucleus stores genetic\nmaterial."], "es"))
+
+    assert backend.inputs == ["The cell nucleus stores genetic material."]
@@ -0,0 +1,94 @@
+import os
+import re
+from typing import Dict, Iterable
+
+from cache import LRUCache, cache_key
+from persistence import ResultStore, translation_store
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Collapse whitespace so reflowed copies of a sentence share one entry"""
+    return _WHITESPACE.sub(" ", sentence).strip()
+
+
+class TranslationMemory:
+    """Sentence translations keyed by (normalized sentence, target language).
+
+    Lookups go to an in-memory LRU first and then to the persistent result
+    store, whose hits are promoted into memory. New translations are written
+    to both; store writes are batched in the background.
+    """
+
+    def __init__(self, store: ResultStore, max_entries: int = 50_000,
+                 max_bytes: int = 32 * 1024 * 1024, ttl_seconds: int = 7 * 24 * 3600):
+        self.store = store
+        self.memory = LRUCache(ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(sentence: str, target: str) -> str:
+        return cache_key("translation_memory", sentence, target)
+
+    async def lookup(self, sentences: Iterable[str], target: str) -> Dict[str, str]:
+        """Known translations for normalized sentences; unknown sentences are left out"""
+        found: Dict[str, str] = {}
+        pending: Dict[str, str] = {}
+        for sentence in sentences:
+            key = self.key(sentence, target)
+            translation = self.memory.get(key)
+            if translation is not None:
+                found[sentence] = translation
+            else:
+                pending[key] = sentence
+        self.memory_hits += len(found)
+
+        if pending:
+            stored = await self.store.get_many(list(pending))
+            for key, document in stored.items():
+                found[pending[key]] = document["translation"]
+                self.memory.set(key, document["translation"])
+            self.store_hits += len(stored)
+            self.misses += len(pending) - len(stored)
+        return found
+
+    def remember(self, translations: Dict[str, str], target: str):
+        """Record new sentence translations"""
+        for sentence, translation in translations.items():
+            if not translation.strip():
+                continue
+            key = self.key(sentence, target)
+            self.memory.set(key, translation)
+            self.store.put(key, {"source": sentence, "target_language": target, "translation": translation})
+
+    def clear(self):
+        """Forget the in-memory translations and reset the counters; the store is kept"""
+        self.memory.clear()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def start(self):
+        self.memory.start()
+
+    async def stop(self):
+        await self.memory.stop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+        }
+
+
+# Global translation memory
+translation_memory = TranslationMemory(
+    translation_store,
+    max_entries=int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "50000")),
+    max_bytes=int(os.getenv("TRANSLATION_MEMORY_MAX_BYTES", str(32 * 1024 * 1024))),
+)
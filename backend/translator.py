@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from chunking import chunk_text, split_paragraphs, split_line_sentences
+from inference import inference_client, InferenceError, TRANSLATE_MODEL, BATCH_SIZE, MAX_PARALLEL_BATCHES, gather_bounded
+from metrics import stage
+from translation_memory import translation_memory, normalize_sentence
+
+logger = logging.getLogger(__name__)
+
+# Supported languages mapping
+LANG_MAP = {
+    "es": "es",
+    "fr": "fr",
+    "de": "de",
+    "it": "it",
+    "pt": "pt",
+    "zh": "zh",
+    "ja": "ja",
+    "ko": "ko"
+}
+
+
+# Streamed translations are emitted paragraph group by paragraph group
+STREAM_CHUNK_CHARS = 1000
+# Sentences longer than this are split before translation (the models accept ~512 tokens)
+MAX_SENTENCE_CHARS = 1000
+
+# Document layout: paragraphs of lines (list items) of sentences
+Layout = List[List[List[str]]]
+
+
+def parse_translations(result, count: int) -> List[str]:
+    """Extract translation texts from a translation model response, in input order"""
+    if isinstance(result, list) and result:
+        translations = [item.get("translation_text", "") if isinstance(item, dict) else str(item) for item in result]
+    else:
+        translations = [str(result)]
+    if len(translations) != count:
+        raise InferenceError(f"Expected {count} translations, got {len(translations)}")
+    return translations
+
+
+async def translate_batch(texts: List[str], target: str) -> List[str]:
+    """Translate several texts to the target language with one upstream call"""
+    model = TRANSLATE_MODEL.format(target_lang=LANG_MAP[target])
+    payload = {"inputs": texts if len(texts) > 1 else texts[0]}
+    with stage("upstream"):
+        result = await inference_client.query(model, payload)
+    return parse_translations(result, len(texts))
+
+
+def _layout(text: str) -> Layout:
+    return [
+        [[normalize_sentence(sentence) for sentence in line] for line in split_line_sentences(paragraph, MAX_SENTENCE_CHARS)]
+        for paragraph in split_paragraphs(text)
+    ]
+
+
+async def translate_documents(texts: List[str], target: str) -> List[str]:
+    """Translate texts sentence by sentence through the translation memory.
+
+    Sentences already in the memory are reused; the unseen ones from all texts
+    are deduplicated and sent upstream together, then every text is
+    reassembled in its original paragraph and line layout.
+    """
+    layouts = [_layout(text) for text in texts]
+    sentences = list(dict.fromkeys(
+        sentence for layout in layouts for paragraph in layout for line in paragraph for sentence in line
+    ))
+    known = await translation_memory.lookup(sentences, target)
+    missing = [sentence for sentence in sentences if sentence not in known]
+
+    if missing:
+        # A bounded number of slices in flight lets the scheduler batch them
+        # without one long text filling its queue
+        batches = await gather_bounded(
+            translate_batch(missing[start:start + BATCH_SIZE], target)
+            for start in range(0, len(missing), BATCH_SIZE)
+        )
+        translated = dict(zip(missing, (translation for batch in batches for translation in batch)))
+        translation_memory.remember(translated, target)
+        known.update(translated)
+
+    logger.info(f"Translated {len(sentences)} distinct sentences, {len(missing)} sent upstream")
+    return [
+        "\n\n".join(
+            "\n".join(" ".join(known[sentence] for sentence in line) for line in paragraph)
+            for paragraph in layout
+        )
+        for layout in layouts
+    ]
+
+
+async def stream_translation(text: str, target: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Translate text, yielding (event, data) pairs as partial output becomes available.
+
+    Multi-paragraph text is translated in chunks that are emitted in order as
+    `chunk` events; a single chunk streams `delta` events when the backend
+    generates token by token. Both end with a `translation` event carrying
+    the full translation. Everything except token streams goes through the
+    translation memory.
+    """
+    chunks = chunk_text(text, STREAM_CHUNK_CHARS)
+    if len(chunks) <= 1 and inference_client.streams_tokens:
+        pieces = []
+        model = TRANSLATE_MODEL.format(target_lang=LANG_MAP[target])
+        async for piece in inference_client.stream(model, {"inputs": text}):
+            pieces.append(piece)
+            yield "delta", {"text": piece}
+        yield "translation", {"translated_text": "".join(pieces)}
+        return
+
+    # Chunks run concurrently so the scheduler can batch them, a bounded number
+    # at a time so a long text does not fill its queue
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_BATCHES)
+
+    async def run(chunk: str) -> List[str]:
+        async with semaphore:
+            return await translate_documents([chunk], target)
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunks]
+    parts = []
+    try:
+        for index, task in enumerate(tasks):
+            translation = (await task)[0]
+            parts.append(translation)
+            if len(chunks) > 1:
+                yield "chunk", {"index": index, "total": len(chunks), "translated_text": translation}
+    finally:
+        for task in tasks:
+            task.cancel()
+    yield "translation", {"translated_text": "\n\n".join(parts)}
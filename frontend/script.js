@@ -346,6 +346,48 @@ function showError(message, type = 'error') {
     }
 }
 
+// Stream Server-Sent Events from a POST endpoint, calling onEvent(event, data) for each one
+async function streamEvents(path, body, onEvent) {
+    const response = await fetch(`${API_BASE}${path}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+        body: JSON.stringify(body)
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || 'Request failed. Please try again.');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+
+            const payload = data ? JSON.parse(data) : {};
+            if (event === 'error') throw new Error(payload.detail || 'Request failed. Please try again.');
+            onEvent(event, payload);
+        }
+    }
+}
+
 // Enhanced upload with progress bar
 async function handleUpload(e) {
     e.preventDefault();
@@ -356,6 +398,7 @@ async function handleUpload(e) {
     const loading = document.getElementById('loading');
     const result = document.getElementById('result');
     const progressBar = document.getElementById('progress-bar');
+    const progressText = document.getElementById('progress-text');
 
     if (!fileInput.files[0] && !textInput.value.trim()) {
         showError('Please select a file or enter text to process.');
@@ -375,12 +418,14 @@ async function handleUpload(e) {
 
     try {
         let text = textInput.value.trim();
+        // Uploaded files are summarized by document id so their text is not sent back and forth
+        let summarizeBody = { text: text };
 
         if (fileInput.files[0]) {
             const formData = new FormData();
             formData.append('file', fileInput.files[0]);
 
-            const response = await fetch(`${API_BASE}/upload/`, {
+            const response = await fetch(`${API_BASE}/upload/?include_content=false`, {
                 method: 'POST',
                 body: formData
             });
@@ -391,13 +436,13 @@ async function handleUpload(e) {
             }
 
             const data = await response.json();
-            text = data.content;
+            text = data.text_length > data.preview.length ? `${data.preview}…` : data.preview;
+            summarizeBody = { document_id: data.document_id };
 
         // Update progress
         if (progressBar) {
             progressBar.style.width = '30%';
         }
-        const progressText = document.getElementById('progress-text');
         if (progressText) {
             progressText.textContent = '30%';
         }
@@ -413,20 +458,33 @@ async function handleUpload(e) {
             progressText.textContent = '60%';
         }
 
-        const summaryResponse = await fetch(`${API_BASE}/summarize/`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ text: text })
+        // Stream the summary so long documents report progress section by section
+        let sectionsDone = 0;
+        let partialSummary = '';
+        await streamEvents('/summarize/stream', summarizeBody, (event, data) => {
+            if (event === 'chunk') {
+                sectionsDone++;
+                const percent = 60 + Math.round(35 * sectionsDone / data.total);
+                if (progressBar) {
+                    progressBar.style.width = `${percent}%`;
+                }
+                if (progressText) {
+                    progressText.textContent = `${percent}% - summarized section ${sectionsDone} of ${data.total}`;
+                }
+            } else if (event === 'delta') {
+                partialSummary += data.text;
+                if (progressText) {
+                    progressText.textContent = partialSummary;
+                }
+            } else if (event === 'summary') {
+                currentSummary = data.summary;
+            }
         });
 
-        if (!summaryResponse.ok) {
-            const errorData = await summaryResponse.json().catch(() => ({}));
-            throw new Error(errorData.detail || 'Summary generation failed. Please try again.');
+        if (!currentSummary) {
+            throw new Error('Summary generation failed. Please try again.');
         }
 
-        const summaryData = await summaryResponse.json();
-        currentSummary = summaryData.summary;
-
         // Complete progress
         if (progressBar) {
             progressBar.style.width = '100%';
@@ -475,24 +533,27 @@ async function handleTranslate() {
     `;
 
     try {
-        const response = await fetch(`${API_BASE}/translate/`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                text: currentSummary,
-                target_language: targetLang
-            })
-        });
-
-        if (!response.ok) {
-            const errorData = await response.json().catch(() => ({}));
-            throw new Error(errorData.detail || 'Translation failed. Please try again.');
-        }
-
-        const data = await response.json();
-        translatedDiv.textContent = data.translated_text;
+        // Render the translation progressively as chunks or tokens arrive
+        const parts = [];
+        let streamed = '';
+        translatedDiv.textContent = '';
         translatedDiv.classList.remove('hidden');
 
+        await streamEvents('/translate/stream', {
+            text: currentSummary,
+            target_language: targetLang
+        }, (event, data) => {
+            if (event === 'chunk') {
+                parts[data.index] = data.translated_text;
+                translatedDiv.textContent = parts.join('\n\n');
+            } else if (event === 'delta') {
+                streamed += data.text;
+                translatedDiv.textContent = streamed;
+            } else if (event === 'translation') {
+                translatedDiv.textContent = data.translated_text;
+            }
+        });
+
     } catch (error) {
         console.error('Translation error:', error);
         showError(error.message, 'error');
@@ -525,18 +586,34 @@ async function loadQuiz() {
     }
 
     try {
+        // Revalidate a quiz already fetched for this summary instead of downloading it again
+        const cachedQuiz = JSON.parse(localStorage.getItem('cachedQuiz') || 'null');
+        const headers = { 'Content-Type': 'application/json' };
+        if (cachedQuiz && cachedQuiz.summary === summary) {
+            headers['If-None-Match'] = cachedQuiz.etag;
+        }
+
         const response = await fetch(`${API_BASE}/quiz/`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: headers,
             body: JSON.stringify({ summary: summary, num_questions: 5 })
         });
 
-        if (!response.ok) {
+        if (!response.ok && response.status !== 304) {
             const errorData = await response.json().catch(() => ({}));
             throw new Error(errorData.detail || 'Quiz generation failed. Please try again.');
         }
 
-        const data = await response.json();
+        let data;
+        if (response.status === 304) {
+            data = cachedQuiz.data;
+        } else {
+            data = await response.json();
+            const etag = response.headers.get('ETag');
+            if (etag) {
+                localStorage.setItem('cachedQuiz', JSON.stringify({ summary: summary, etag: etag, data: data }));
+            }
+        }
         currentQuiz = data.questions;
         userAnswers = new Array(currentQuiz.length).fill(null);
 